@@ -19,8 +19,16 @@ except ImportError:
 
 from config.settings import PAGE_CONFIG, CUSTOM_CSS
 from utils.groq_client import init_groq_client
-from utils.sharepoint import SHAREPOINT_AVAILABLE, SHAREPOINT_ERROR
-from ui.tabs import render_upload_tab, render_database_tab, render_matching_tab, render_analytics_tab
+from utils.llm_cache import clear_llm_cache
+from utils.semantic_cache import clear_semantic_cache
+from utils.sharepoint import SHAREPOINT_AVAILABLE, SHAREPOINT_ERROR, connect_to_sharepoint
+from ui.tabs import (
+    render_upload_tab,
+    render_database_tab,
+    render_matching_tab,
+    render_analytics_tab,
+    render_restore_candidates,
+)
 
 # ── Page Configuration ─────────────────────────────────────────────────────────
 st.set_page_config(**PAGE_CONFIG)
@@ -31,6 +39,7 @@ defaults = {
     'parsed_resumes': [],
     'candidates_df': None,
     'matched_results': None,
+    'interview_questions': {},
     'resume_texts': {},
     'resume_metadata': {},
 
@@ -45,6 +54,7 @@ defaults = {
         'drive_id': os.getenv('DRIVE_ID', ''),
         'input_folder_path': os.getenv('INPUT_FOLDER_PATH', ''),
         'output_folder_path': os.getenv('OUTPUT_FOLDER_PATH', ''),
+        'compress_csv': os.getenv('COMPRESS_CSV_UPLOADS', '').lower() in ('1', 'true', 'yes'),
         'connected': False,
     },
 }
@@ -116,6 +126,28 @@ def main():
 
         st.divider()
 
+        # ── LLM Cache ──────────────────────────────────────────────────────────
+        st.subheader("🗄️ LLM Cache")
+        use_llm_cache = st.checkbox(
+            "Use LLM cache", value=True,
+            help="Reuse stored Groq responses for identical resumes and job descriptions",
+        )
+        reuse_near_duplicates = st.checkbox(
+            "Reuse results for near-duplicate job descriptions", value=False,
+            help="Serve a cached result when a JD is almost identical to one already processed",
+        )
+        semantic_threshold = None
+        if reuse_near_duplicates:
+            semantic_threshold = st.slider("Similarity threshold", 0.90, 1.00, 0.97, 0.01)
+        if st.button("🧹 Clear LLM cache", use_container_width=True):
+            clear_llm_cache()
+            clear_semantic_cache()
+            st.success("✅ LLM cache cleared")
+        # Reload the last parsed batch after a restart instead of re-parsing
+        render_restore_candidates()
+
+        st.divider()
+
         # ── SharePoint Configuration ───────────────────────────────────────────
         sp = st.session_state.sharepoint_config
 
@@ -139,31 +171,13 @@ def main():
             ]
 
             if all(required):
-                try:
-                    import msal
-
-                    authority = f"https://login.microsoftonline.com/{sp['tenant_id']}"
-
-                    msal_app = msal.ConfidentialClientApplication(
-                        sp['client_id'],
-                        authority=authority,
-                        client_credential=sp['client_secret'],
-                    )
-
-                    token_res = msal_app.acquire_token_for_client(
-                        scopes=["https://graph.microsoft.com/.default"]
-                    )
-
-                    if "access_token" in token_res:
-                        sp['connected'] = True
-                        st.session_state.sharepoint_config = sp
-                        st.success("✅ SharePoint Connected")
-                        st.rerun()
-                    else:
-                        st.error("Auth failed")
-
-                except Exception as e:
-                    st.error(f"Connection error: {e}")
+                # Signs in through the shared MSAL app, so later actions reuse its token;
+                # failures are reported by connect_to_sharepoint
+                if connect_to_sharepoint(sp) is not None:
+                    sp['connected'] = True
+                    st.session_state.sharepoint_config = sp
+                    st.success("✅ SharePoint Connected")
+                    st.rerun()
 
             else:
                 st.error("Missing values in .env")
@@ -177,7 +191,9 @@ def main():
         if use_date_filter:
             if st.session_state.candidates_df is not None and 'submission_date' in st.session_state.candidates_df.columns:
                 try:
-                    df_dates = pd.to_datetime(st.session_state.candidates_df['submission_date'])
+                    df_dates = st.session_state.candidates_df['submission_date']
+                    if not pd.api.types.is_datetime64_any_dtype(df_dates):
+                        df_dates = pd.to_datetime(df_dates)
                     min_date = df_dates.min().date()
                     max_date = df_dates.max().date()
                 except Exception:
@@ -210,6 +226,8 @@ def main():
 
     # ── Store config ───────────────────────────────────────────────────────────
     st.session_state['mask_pii_enabled'] = mask_pii_enabled
+    st.session_state['use_llm_cache'] = use_llm_cache
+    st.session_state['semantic_cache_threshold'] = semantic_threshold
     st.session_state['use_date_filter'] = use_date_filter
     st.session_state['start_date'] = start_date
     st.session_state['end_date'] = end_date
@@ -2,6 +2,8 @@
 Application settings and configuration - UPDATED WITH LIGHT COLORS
 """
 
+import os
+
 # Page Configuration
 PAGE_CONFIG = {
     "page_title": "Recruitment Screening System",
@@ -10,6 +12,20 @@ PAGE_CONFIG = {
     "initial_sidebar_state": "expanded"
 }
 
+# Maximum Groq requests in flight when parsing a batch of resumes
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+
+# Resumes parsed per Groq request (shared prompt, one JSON array back); 1 disables batching
+RESUME_PARSE_BATCH_SIZE = int(os.getenv("RESUME_PARSE_BATCH_SIZE", "6"))
+
+# Send long resumes to the parser as their contact / experience / skills sections only
+# (RESUME_TRIM_CHARS budget) instead of the first RESUME_TEXT_MAX_CHARS characters
+AGGRESSIVE_TRIM = os.getenv("AGGRESSIVE_TRIM", "").lower() in ("1", "true", "yes")
+RESUME_TRIM_CHARS = int(os.getenv("RESUME_TRIM_CHARS", "3000"))
+
+# Groq SDK retries (429 / 5xx / connection errors), honouring Retry-After
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+
 # Custom CSS - UPDATED WITH LIGHT COLORS
 CUSTOM_CSS = """
     <style>
@@ -60,6 +76,49 @@ CUSTOM_CSS = """
         font-size: 15px;
     }
     
+    /* Pre-screening summary pills */
+    .summary-pill {
+        background: linear-gradient(135deg, rgba(227,242,253,0.5) 0%, rgba(187,222,251,0.5) 100%);
+        padding: 15px 25px;
+        border-radius: 25px;
+        border-left: 4px solid #42A5F5;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.1);
+        font-size: 16px;
+        font-weight: 600;
+        color: #1976D2;
+        margin: 15px 0;
+    }
+    .summary-pill.summary-split {
+        margin: 10px 0;
+        min-height: 80px;
+        display: flex;
+        align-items: center;
+    }
+    .summary-pill.summary-success {
+        background: linear-gradient(135deg, rgba(200,230,201,0.5) 0%, rgba(165,214,167,0.5) 100%);
+        border-left-color: #66BB6A;
+        color: #2E7D32;
+    }
+    
+    /* Ranked candidate cards - border and score colour by match tier */
+    .cand-card {
+        border-left: 5px solid #EF5350;
+        padding: 20px;
+        margin: 15px 0;
+        background: #FAFAFA;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.08);
+    }
+    .cand-card h3 { font-size: 18px; }
+    .cand-card .cand-score { float: right; font-size: 1.8rem; color: #EF5350; }
+    .cand-card p { font-size: 16px; }
+    .cand-card .cand-email { color: #555; margin-top: 5px; }
+    .cand-card .cand-scores { font-size: 15px; color: #666; margin-top: 10px; }
+    .cand-score-high { border-left-color: #66BB6A; }
+    .cand-score-high .cand-score { color: #66BB6A; }
+    .cand-score-mid { border-left-color: #FFA726; }
+    .cand-score-mid .cand-score { color: #FFA726; }
+    
     /* Table styling with light colors */
     .dataframe {
         font-size: 16px;
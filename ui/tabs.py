@@ -4,27 +4,29 @@ UI Tab rendering functions - UPDATED WITH UI IMPROVEMENTS + GRAPH API SHAREPOINT
 
 import streamlit as st
 import pandas as pd
-import io
+import json
+import time
 from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
 
-from utils.file_handlers import extract_text_from_file
-from utils.preprocessing import parse_resume_with_groq, extract_jd_requirements
+from utils.file_handlers import extract_text_cached, extract_texts_parallel, dataframe_to_csv_bytes
+from utils.preprocessing import parse_resumes_concurrently, extract_jd_requirements
+from utils.candidate_store import save_candidates, load_candidates, has_saved_candidates
 from utils.scoring import (
-    match_candidates_with_jd,
+    match_candidates_sharded,
     auto_pre_screen_candidates,
     generate_interview_questions,
+    generate_interview_questions_concurrently,
     format_strengths_weaknesses,
     format_dataframe_for_display,
+    tech_stack_text,
 )
 from utils.sharepoint import (
     SHAREPOINT_AVAILABLE,
-    upload_to_sharepoint,
+    batch_upload_to_sharepoint,
     download_from_sharepoint,
     save_csv_to_sharepoint,
 )
-from config.settings import JD_TEMPLATES
+from config.settings import JD_TEMPLATES, COLUMN_DISPLAY_NAMES
 
 
 # ── Helper ─────────────────────────────────────────────────────────────────────
@@ -34,8 +36,267 @@ def _sp_config():
     return st.session_state.get('sharepoint_config', {})
 
 
-def _sp_connected():
-    return _sp_config().get('connected', False)
+SUBMISSION_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _submission_dates(df):
+    """submission_date as datetimes; parsed only when the column is not already datetime."""
+    submission_date = df['submission_date']
+    if pd.api.types.is_datetime64_any_dtype(submission_date):
+        return submission_date
+    return pd.to_datetime(submission_date, format=SUBMISSION_DATE_FORMAT, errors='coerce', cache=True)
+
+
+def _build_candidates_df(parsed_resumes):
+    """Build the candidates dataframe with numeric experience and datetime
+    submission dates, canonicalised once so filters never re-parse them."""
+    df = pd.DataFrame(parsed_resumes)
+    if 'experience_years' in df.columns:
+        df['experience_years'] = pd.to_numeric(df['experience_years'], errors='coerce').fillna(0)
+    if 'submission_date' in df.columns:
+        df['submission_date'] = _submission_dates(df)
+    # Arrow-backed strings give native kernels for the lower/split/contains work on skills
+    if 'tech_stack' in df.columns and pd.api.types.infer_dtype(df['tech_stack'], skipna=True) == 'string':
+        df['tech_stack'] = df['tech_stack'].astype('string[pyarrow]')
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _df_to_csv_bytes(df):
+    """Serialise a dataframe to UTF-8 CSV bytes once per unique dataframe."""
+    return dataframe_to_csv_bytes(df)
+
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=32)
+def _cached_jd_requirements(job_desc, _client):
+    """Extract JD requirements once per unique job description text.
+
+    Failed extractions raise so they are not cached and can be retried.
+    Entries expire after an hour; the persistent LLM cache still answers
+    a JD seen before, so expiry costs a SQLite lookup, not a Groq call.
+    """
+    jd_requirements = extract_jd_requirements(_client, job_desc)
+    if jd_requirements is None:
+        raise ValueError("Could not extract job requirements")
+    return jd_requirements
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _date_filtered(df, start_date, end_date):
+    """Restrict df to submissions between start_date and end_date (inclusive)."""
+    try:
+        submission_date = _submission_dates(df)
+        in_range = (
+            (submission_date >= pd.Timestamp(start_date)) &
+            (submission_date < pd.Timestamp(end_date) + pd.Timedelta(days=1))
+        )
+        return df[in_range].assign(submission_date=submission_date[in_range])
+    except Exception:
+        return df
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _display_df(df, columns):
+    """Rename/select display columns once per (dataframe, column selection)."""
+    return format_dataframe_for_display(df, list(columns))
+
+
+def _apply_date_filter(df):
+    """Apply the sidebar date range to df when the date filter is enabled."""
+    start_date = st.session_state.get('start_date')
+    end_date = st.session_state.get('end_date')
+    if st.session_state.get('use_date_filter', False) and start_date and end_date:
+        return _date_filtered(df, start_date, end_date)
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_pre_screen(df, jd_requirements_json):
+    """Pre-screen df once per unique (dataframe, JD requirements) pair."""
+    return auto_pre_screen_candidates(df, json.loads(jd_requirements_json))
+
+
+def _toggle_column_selector():
+    st.session_state.show_column_selector = not st.session_state.show_column_selector
+
+
+def _apply_column_selection():
+    st.session_state.selected_columns = st.session_state.column_selector_cols
+    st.session_state.show_column_selector = False
+
+
+def _column_selector(available_cols):
+    """Column picker for the candidate pool table.
+
+    State changes happen in widget callbacks, which run before the script
+    reruns, so toggling or applying costs one rerun instead of two.
+    """
+    st.markdown("""
+    <style>
+    .checkbox-header {
+        font-weight: 600; padding: 10px 15px; background: white;
+        border: 1px solid #ddd; border-bottom: 2px solid #3F51B5;
+        border-radius: 8px 8px 0 0; margin-top: 10px;
+        color: #3F51B5; font-size: 16px;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    st.markdown('<div class="checkbox-header">📋 Select Columns to Display</div>', unsafe_allow_html=True)
+
+    # A form applies the whole selection in one rerun instead of one per click
+    with st.form("column_selector"):
+        st.multiselect(
+            "Columns",
+            available_cols,
+            default=[col for col in st.session_state.selected_columns if col in available_cols],
+            format_func=lambda col: COLUMN_DISPLAY_NAMES.get(col, col),
+            label_visibility="collapsed",
+            key="column_selector_cols",
+        )
+        close_col1, close_col2, close_col3 = st.columns([2, 1, 2])
+        with close_col2:
+            st.form_submit_button("✓ Apply", type="primary", use_container_width=True,
+                                  on_click=_apply_column_selection)
+
+
+def _stream_progress(placeholder, label):
+    """Callback showing streamed characters in placeholder, redrawn at most every 0.25s."""
+    last_update = [0.0]
+
+    def _on_progress(received):
+        now = time.monotonic()
+        if now - last_update[0] >= 0.25:
+            last_update[0] = now
+            placeholder.caption(f"{label}: {received} characters received")
+
+    return _on_progress
+
+
+# st.fragment (Streamlit 1.37+, experimental from 1.33) reruns only the decorated block when
+# its own widgets change; on older versions the block simply runs as part of the page.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
+def _render_interview_questions(name, questions):
+    """Render a candidate's generated interview questions."""
+    st.markdown("---")
+    st.subheader(f"Interview Questions for {name}")
+    st.markdown("\n\n---\n\n".join(
+        f"**Question {idx} ({q.get('category')}):**\n"
+        f"{q.get('question')}\n"
+        f"*💡 Why we're asking: {q.get('why_asking')}*"
+        for idx, q in enumerate(questions, 1)
+    ) + "\n\n---")
+
+
+@_fragment
+def _interview_questions_block(client, cand_data, job_desc, rank, name):
+    """Per-candidate generate button plus any questions already stored for them."""
+    questions = st.session_state.interview_questions.get(name)
+    if st.button(f"🎤 Generate Interview Questions", key=f"q_{rank}"):
+        with st.spinner("Generating personalised interview questions…"):
+            question_status = st.empty()
+            questions = generate_interview_questions(
+                client, cand_data, job_desc,
+                on_progress=_stream_progress(question_status, "Writing questions"),
+            )
+            question_status.empty()
+            if questions:
+                st.session_state.interview_questions[name] = questions
+    if questions:
+        _render_interview_questions(name, questions)
+
+
+def _generate_all_interview_questions(client, job_desc):
+    """Generate questions for every ranked candidate at once, keeping them per name."""
+    candidates_df = st.session_state.candidates_df
+    names = [cand.get('name', 'Unknown') for cand in st.session_state.matched_results]
+    profiles = {
+        row['name']: row
+        for row in candidates_df[candidates_df['name'].isin(names)].drop_duplicates('name').to_dict('records')
+    }
+    candidates = [profiles[name] for name in names if name in profiles]
+
+    progress = st.progress(0)
+    status = st.empty()
+
+    def _on_done(done, cand_data):
+        progress.progress(done / len(candidates))
+        status.text(f"Questions ready: {cand_data.get('name')} ({done}/{len(candidates)})")
+
+    all_questions = generate_interview_questions_concurrently(client, candidates, job_desc, on_done=_on_done)
+    for cand_data, questions in zip(candidates, all_questions):
+        if questions:
+            st.session_state.interview_questions[cand_data['name']] = questions
+
+    progress.empty()
+    status.empty()
+
+
+def _extraction_progress(status):
+    """Status callback for extract_texts_parallel."""
+    def _on_extracted(done, total, file_name):
+        status.text(f"Extracted: {file_name} ({done}/{total})")
+    return _on_extracted
+
+
+def _parse_and_store(client, resumes, mask_pii_enabled, progress, status):
+    """Parse extracted resumes concurrently and record them in session state."""
+    if not resumes:
+        return
+    status.text(f"Parsing {len(resumes)} resumes…")
+
+    def _on_parsed(done, resume):
+        progress.progress(done / len(resumes))
+        status.text(f"Parsed: {resume['filename']} ({done}/{len(resumes)})")
+
+    last_update = [0.0]
+
+    def _on_progress(resume, received):
+        # Throttle status redraws; streamed chunks arrive far faster than needed
+        now = time.monotonic()
+        if now - last_update[0] >= 0.25:
+            last_update[0] = now
+            status.text(f"Parsing {resume['filename']}: {received} chars received")
+
+    parsed_list = parse_resumes_concurrently(
+        client, resumes, mask_pii_enabled, on_parsed=_on_parsed, on_progress=_on_progress,
+    )
+    for resume, parsed in zip(resumes, parsed_list):
+        if parsed:
+            st.session_state.parsed_resumes.append(parsed)
+            st.session_state.resume_texts[parsed.get('name', '')] = resume['text']
+            st.session_state.resume_metadata[parsed.get('name', '')] = {
+                'submission_date': resume['upload_date'],
+                'filename': resume['filename'],
+            }
+
+    if st.session_state.parsed_resumes:
+        save_candidates(st.session_state.parsed_resumes, st.session_state.resume_metadata)
+
+
+def render_restore_candidates():
+    """
+    Sidebar button loading the last parsed batch from the local store into
+    an empty session. Opt-in, since the store is shared by everyone using
+    this app instance. Resume text is not stored, so restored candidates
+    are matched without the TF-IDF similarity score.
+    """
+    if st.session_state.parsed_resumes or not has_saved_candidates():
+        return
+    if not st.button("♻️ Restore last batch", use_container_width=True):
+        return
+
+    saved = load_candidates()
+    if saved and saved[0]:
+        parsed_resumes, resume_metadata = saved
+        st.session_state.parsed_resumes = parsed_resumes
+        st.session_state.resume_texts = {}
+        st.session_state.resume_metadata = resume_metadata
+        st.session_state.candidates_df = _build_candidates_df(parsed_resumes)
+        st.rerun()
+    st.warning("No saved batch could be loaded")
 
 
 # ── Upload Tab ─────────────────────────────────────────────────────────────────
@@ -46,6 +307,8 @@ def render_upload_tab():
 
     client = st.session_state.get('client')
     mask_pii_enabled = st.session_state.get('mask_pii_enabled', True)
+    sp = _sp_config()
+    sp_connected = sp.get('connected', False)
 
     upload_method = st.radio(
         "Choose upload method:",
@@ -61,7 +324,7 @@ def render_upload_tab():
             st.error("⚠️ `msal` library not available. Install it with `pip install msal`.")
             return
 
-        if not _sp_connected():
+        if not sp_connected:
             st.warning("⚠️ SharePoint is not connected. Please fill in the credentials in the sidebar and click **Connect to SharePoint**.")
             return
 
@@ -76,7 +339,6 @@ def render_upload_tab():
         if sharepoint_action == "📥 Download Resumes from SharePoint":
             if st.button("📥 Download All Resumes", type="primary"):
                 with st.spinner("Downloading resumes from SharePoint…"):
-                    sp = _sp_config()
                     downloaded_files = download_from_sharepoint(sp)
 
                     if downloaded_files and client:
@@ -89,10 +351,14 @@ def render_upload_tab():
                         st.session_state.resume_texts = {}
                         st.session_state.resume_metadata = {}
 
-                        for idx, file_data in enumerate(downloaded_files):
-                            status.text(f"Processing: {file_data['name']}")
-                            text = extract_text_from_file(file_data)
+                        status.text(f"Extracting text from {len(downloaded_files)} files…")
+                        texts = extract_texts_parallel(
+                            [(f['content'], f['name']) for f in downloaded_files],
+                            on_extracted=_extraction_progress(status),
+                        )
 
+                        resumes = []
+                        for file_data, text in zip(downloaded_files, texts):
                             if text:
                                 upload_date = file_data.get('timestamp', datetime.now().isoformat())
                                 if isinstance(upload_date, str):
@@ -102,23 +368,15 @@ def render_upload_tab():
                                         ).strftime("%Y-%m-%d %H:%M:%S")
                                     except Exception:
                                         upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                resumes.append({'text': text, 'filename': file_data['name'], 'upload_date': upload_date})
 
-                                parsed = parse_resume_with_groq(client, text, file_data['name'], mask_pii_enabled, upload_date)
-                                if parsed:
-                                    st.session_state.parsed_resumes.append(parsed)
-                                    st.session_state.resume_texts[parsed.get('name', '')] = text
-                                    st.session_state.resume_metadata[parsed.get('name', '')] = {
-                                        'submission_date': upload_date,
-                                        'filename': file_data['name'],
-                                    }
-
-                            progress.progress((idx + 1) / len(downloaded_files))
+                        _parse_and_store(client, resumes, mask_pii_enabled, progress, status)
 
                         status.empty()
                         progress.empty()
 
                         if st.session_state.parsed_resumes:
-                            st.session_state.candidates_df = pd.DataFrame(st.session_state.parsed_resumes)
+                            st.session_state.candidates_df = _build_candidates_df(st.session_state.parsed_resumes)
                             st.success(f"✅ Successfully parsed {len(st.session_state.parsed_resumes)} resumes from SharePoint!")
                     elif not downloaded_files:
                         st.warning("No PDF/DOCX files found in the configured SharePoint folder.")
@@ -136,13 +394,9 @@ def render_upload_tab():
 
             if uploaded_files_sp:
                 if st.button("📤 Upload to SharePoint", type="primary"):
-                    sp = _sp_config()
-                    success_count = 0
-                    for file in uploaded_files_sp:
-                        file_content = file.read()
-                        file.seek(0)
-                        if upload_to_sharepoint(sp, file_content, file.name):
-                            success_count += 1
+                    success_count = batch_upload_to_sharepoint(
+                        sp, [(file.name, file.getvalue()) for file in uploaded_files_sp]
+                    )
                     if success_count > 0:
                         st.success(f"✅ Uploaded {success_count}/{len(uploaded_files_sp)} files to SharePoint!")
 
@@ -161,6 +415,9 @@ def render_upload_tab():
             st.metric("✅ Parsed", len(st.session_state.parsed_resumes))
 
         if uploaded_files and client:
+            # Read each upload once; getvalue() leaves the cursor alone so no seek is needed
+            file_blobs = [(f.name, f.getvalue()) for f in uploaded_files]
+
             if st.button("🚀 Parse All Resumes", type="primary"):
                 progress = st.progress(0)
                 status = st.empty()
@@ -169,48 +426,39 @@ def render_upload_tab():
                 st.session_state.resume_texts = {}
                 st.session_state.resume_metadata = {}
 
-                for idx, file in enumerate(uploaded_files):
-                    status.text(f"Processing: {file.name}")
-                    text = extract_text_from_file(file)
+                status.text(f"Extracting text from {len(uploaded_files)} files…")
+                texts = extract_texts_parallel(
+                    [(content, name) for name, content in file_blobs],
+                    on_extracted=_extraction_progress(status),
+                )
 
+                resumes = []
+                for (name, _), text in zip(file_blobs, texts):
                     if text:
                         upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        parsed = parse_resume_with_groq(client, text, file.name, mask_pii_enabled, upload_date)
-                        if parsed:
-                            st.session_state.parsed_resumes.append(parsed)
-                            st.session_state.resume_texts[parsed.get('name', '')] = text
-                            st.session_state.resume_metadata[parsed.get('name', '')] = {
-                                'submission_date': upload_date,
-                                'filename': file.name,
-                            }
+                        resumes.append({'text': text, 'filename': name, 'upload_date': upload_date})
 
-                    progress.progress((idx + 1) / len(uploaded_files))
+                _parse_and_store(client, resumes, mask_pii_enabled, progress, status)
 
                 status.empty()
                 progress.empty()
 
                 if st.session_state.parsed_resumes:
-                    st.session_state.candidates_df = pd.DataFrame(st.session_state.parsed_resumes)
+                    st.session_state.candidates_df = _build_candidates_df(st.session_state.parsed_resumes)
                     st.success(f"✅ Successfully parsed {len(st.session_state.parsed_resumes)} resumes!")
 
                     # Option to save to SharePoint
-                    if _sp_connected():
+                    if sp_connected:
                         if st.button("💾 Save to SharePoint"):
-                            sp = _sp_config()
-                            for file in uploaded_files:
-                                file_content = file.read()
-                                file.seek(0)
-                                upload_to_sharepoint(sp, file_content, file.name)
+                            batch_upload_to_sharepoint(sp, file_blobs)
 
                             csv_filename = f"parsed_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                             if save_csv_to_sharepoint(sp, st.session_state.candidates_df, csv_filename):
                                 st.success("✅ Resumes and parsed data saved to SharePoint!")
 
-                    csv_buffer = io.StringIO()
-                    st.session_state.candidates_df.to_csv(csv_buffer, index=False)
                     st.download_button(
                         "💾 Download Parsed Data (CSV)",
-                        csv_buffer.getvalue(),
+                        _df_to_csv_bytes(st.session_state.candidates_df),
                         f"candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                         "text/csv",
                     )
@@ -233,28 +481,16 @@ def render_upload_tab():
 
 def render_database_tab():
     """Render the Candidate Pool tab"""
-    from config.settings import COLUMN_DISPLAY_NAMES
 
     st.header("Candidate Database")
 
     use_date_filter = st.session_state.get('use_date_filter', False)
-    start_date = st.session_state.get('start_date')
-    end_date = st.session_state.get('end_date')
+    sp = _sp_config()
+    sp_connected = sp.get('connected', False)
 
     if st.session_state.candidates_df is not None:
-        df = st.session_state.candidates_df.copy()
         total_candidates_count = len(st.session_state.candidates_df)
-
-        filtered_df = df.copy()
-        if use_date_filter and start_date and end_date:
-            try:
-                filtered_df['submission_date'] = pd.to_datetime(filtered_df['submission_date'])
-                filtered_df = filtered_df[
-                    (filtered_df['submission_date'].dt.date >= start_date) &
-                    (filtered_df['submission_date'].dt.date <= end_date)
-                ]
-            except Exception:
-                pass
+        filtered_df = _apply_date_filter(st.session_state.candidates_df)
 
         col1, col2 = st.columns(2)
         with col1:
@@ -290,51 +526,15 @@ def render_database_tab():
 
         col_spacer, col_button = st.columns([5, 1])
         with col_button:
-            if st.button("➕ Add Column", type="secondary", use_container_width=True, key="add_col_btn"):
-                st.session_state.show_column_selector = not st.session_state.show_column_selector
-                st.rerun()
+            st.button("➕ Add Column", type="secondary", use_container_width=True, key="add_col_btn",
+                      on_click=_toggle_column_selector)
 
         if st.session_state.show_column_selector:
-            st.markdown("""
-            <style>
-            .checkbox-header {
-                font-weight: 600; padding: 10px 15px; background: white;
-                border: 1px solid #ddd; border-bottom: 2px solid #3F51B5;
-                border-radius: 8px 8px 0 0; margin-top: 10px;
-                color: #3F51B5; font-size: 16px;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-
-            st.markdown('<div class="checkbox-header">📋 Select Columns to Display</div>', unsafe_allow_html=True)
-
-            num_cols_per_row = 4
-            for i in range(0, len(available_cols), num_cols_per_row):
-                cols = st.columns(num_cols_per_row)
-                for j, col_widget in enumerate(cols):
-                    col_index = i + j
-                    if col_index < len(available_cols):
-                        col = available_cols[col_index]
-                        display_name = COLUMN_DISPLAY_NAMES.get(col, col)
-                        is_selected = col in st.session_state.selected_columns
-                        with col_widget:
-                            if st.checkbox(display_name, value=is_selected, key=f"col_check_{col}"):
-                                if col not in st.session_state.selected_columns:
-                                    st.session_state.selected_columns.append(col)
-                            else:
-                                if col in st.session_state.selected_columns:
-                                    st.session_state.selected_columns.remove(col)
-
-            st.markdown("---")
-            close_col1, close_col2, close_col3 = st.columns([2, 1, 2])
-            with close_col2:
-                if st.button("✓ Close", type="primary", use_container_width=True, key="close_dropdown"):
-                    st.session_state.show_column_selector = False
-                    st.rerun()
+            _column_selector(available_cols)
 
         display_cols = st.session_state.selected_columns
         if display_cols:
-            formatted_df = format_dataframe_for_display(filtered_df, display_cols)
+            formatted_df = _display_df(filtered_df, tuple(display_cols))
             st.markdown("""
             <style>
             .dataframe { font-size: 16px !important; }
@@ -347,18 +547,15 @@ def render_database_tab():
         if not filtered_df.empty:
             col1, col2 = st.columns(2)
             with col1:
-                csv_buffer = io.StringIO()
-                filtered_df.to_csv(csv_buffer, index=False)
                 st.download_button(
                     "📥 Download Database (CSV)",
-                    csv_buffer.getvalue(),
+                    _df_to_csv_bytes(filtered_df),
                     f"candidate_database_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                     "text/csv",
                 )
             with col2:
-                if _sp_connected():
+                if sp_connected:
                     if st.button("☁️ Save Database to SharePoint"):
-                        sp = _sp_config()
                         csv_filename = f"candidate_database_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                         if save_csv_to_sharepoint(sp, filtered_df, csv_filename):
                             st.success("✅ Database saved to SharePoint!")
@@ -374,9 +571,8 @@ def render_matching_tab():
 
     client = st.session_state.get('client')
     top_n = st.session_state.get('top_n', 5)
-    use_date_filter = st.session_state.get('use_date_filter', False)
-    start_date = st.session_state.get('start_date')
-    end_date = st.session_state.get('end_date')
+    sp = _sp_config()
+    sp_connected = sp.get('connected', False)
 
     if st.session_state.candidates_df is not None:
         st.subheader("📌 Job Description Input")
@@ -391,7 +587,7 @@ def render_matching_tab():
         if jd_input_mode == "Upload File (PDF/DOCX)":
             jd_file = st.file_uploader("Upload Job Description", type=['pdf', 'docx'], key="jd_upload")
             if jd_file:
-                jd_text = extract_text_from_file(jd_file)
+                jd_text = extract_text_cached(jd_file.getvalue(), jd_file.name)
                 if jd_text:
                     job_desc = jd_text
                     st.success("✅ Job description loaded successfully!")
@@ -415,7 +611,10 @@ def render_matching_tab():
 
             if st.button("Analyze JD & Match Candidates", type="primary", use_container_width=True):
                 with st.spinner("Analyzing job requirements…"):
-                    jd_requirements = extract_jd_requirements(client, job_desc)
+                    try:
+                        jd_requirements = _cached_jd_requirements(job_desc, client)
+                    except ValueError:
+                        jd_requirements = None
 
                     if jd_requirements:
                         st.success("✅ Job requirements extracted successfully!")
@@ -432,94 +631,59 @@ def render_matching_tab():
                                     st.write(f"**Preferred Skills:** {', '.join(jd_requirements.get('preferred_skills', []))}")
 
                         with st.spinner("Pre-screening candidates…"):
-                            df_to_screen = st.session_state.candidates_df.copy()
-                            if use_date_filter and start_date and end_date:
-                                try:
-                                    df_to_screen['submission_date'] = pd.to_datetime(df_to_screen['submission_date'])
-                                    df_to_screen = df_to_screen[
-                                        (df_to_screen['submission_date'].dt.date >= start_date) &
-                                        (df_to_screen['submission_date'].dt.date <= end_date)
-                                    ]
-                                except Exception:
-                                    pass
-
-                            filtered_df, screening_summary = auto_pre_screen_candidates(df_to_screen, jd_requirements)
+                            df_to_screen = _apply_date_filter(st.session_state.candidates_df)
+                            filtered_df, screening_summary = _cached_pre_screen(
+                                df_to_screen, json.dumps(jd_requirements, sort_keys=True)
+                            )
 
                             if screening_summary:
                                 st.markdown("### Pre-Screening Results")
                                 if len(screening_summary) > 0 and "weighs in both" in screening_summary[0]:
-                                    st.markdown(f'''
-                                    <div style="background: linear-gradient(135deg, rgba(227,242,253,0.5) 0%, rgba(187,222,251,0.5) 100%);
-                                                padding: 15px 25px; border-radius: 25px; border-left: 4px solid #42A5F5;
-                                                box-shadow: 0 2px 6px rgba(0,0,0,0.1); font-size: 16px; font-weight: 600;
-                                                color: #1976D2; margin: 15px 0;">
-                                        {screening_summary[0]}
-                                    </div>
-                                    ''', unsafe_allow_html=True)
+                                    st.markdown(f'<div class="summary-pill">{screening_summary[0]}</div>', unsafe_allow_html=True)
 
                                 if len(screening_summary) >= 3:
                                     col1, col2 = st.columns(2)
                                     with col1:
-                                        if len(screening_summary) > 1:
-                                            st.markdown(f'''
-                                            <div style="background: linear-gradient(135deg, rgba(227,242,253,0.5) 0%, rgba(187,222,251,0.5) 100%);
-                                                        padding: 15px 25px; border-radius: 25px; border-left: 4px solid #42A5F5;
-                                                        box-shadow: 0 2px 6px rgba(0,0,0,0.1); font-size: 16px; font-weight: 600;
-                                                        color: #1976D2; margin: 10px 0; min-height: 80px; display: flex; align-items: center;">
-                                                {screening_summary[1]}
-                                            </div>
-                                            ''', unsafe_allow_html=True)
+                                        st.markdown(f'<div class="summary-pill summary-split">{screening_summary[1]}</div>', unsafe_allow_html=True)
                                     with col2:
-                                        if len(screening_summary) > 2:
-                                            st.markdown(f'''
-                                            <div style="background: linear-gradient(135deg, rgba(227,242,253,0.5) 0%, rgba(187,222,251,0.5) 100%);
-                                                        padding: 15px 25px; border-radius: 25px; border-left: 4px solid #42A5F5;
-                                                        box-shadow: 0 2px 6px rgba(0,0,0,0.1); font-size: 16px; font-weight: 600;
-                                                        color: #1976D2; margin: 10px 0; min-height: 80px; display: flex; align-items: center;">
-                                                {screening_summary[2]}
-                                            </div>
-                                            ''', unsafe_allow_html=True)
+                                        st.markdown(f'<div class="summary-pill summary-split">{screening_summary[2]}</div>', unsafe_allow_html=True)
 
                                     if len(screening_summary) > 3:
-                                        st.markdown(f'''
-                                        <div style="background: linear-gradient(135deg, rgba(200,230,201,0.5) 0%, rgba(165,214,167,0.5) 100%);
-                                                    padding: 15px 25px; border-radius: 25px; border-left: 4px solid #66BB6A;
-                                                    box-shadow: 0 2px 6px rgba(0,0,0,0.1); font-size: 16px; font-weight: 600;
-                                                    color: #2E7D32; margin: 15px 0;">
-                                            {screening_summary[3]}
-                                        </div>
-                                        ''', unsafe_allow_html=True)
+                                        st.markdown(f'<div class="summary-pill summary-success">{screening_summary[3]}</div>', unsafe_allow_html=True)
 
                             if not filtered_df.empty:
                                 st.subheader("✅ Pre-Screened Candidates")
                                 prescreened_cols = ['name', 'email', 'experience_years', 'tech_stack', 'current_role']
                                 available_prescreened_cols = [col for col in prescreened_cols if col in filtered_df.columns]
-                                formatted_prescreened = format_dataframe_for_display(filtered_df, available_prescreened_cols)
+                                formatted_prescreened = _display_df(filtered_df, tuple(available_prescreened_cols))
                                 st.dataframe(formatted_prescreened, use_container_width=True, hide_index=True, height=300)
 
-                                csv_buffer = io.StringIO()
-                                filtered_df.to_csv(csv_buffer, index=False)
                                 col1, col2 = st.columns(2)
                                 with col1:
                                     st.download_button(
                                         "📥 Download Pre-Screened Candidates (CSV)",
-                                        csv_buffer.getvalue(),
+                                        _df_to_csv_bytes(filtered_df),
                                         f"prescreened_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                                         "text/csv",
                                     )
                                 with col2:
-                                    if _sp_connected():
+                                    if sp_connected:
                                         if st.button("☁️ Save to SharePoint"):
-                                            sp = _sp_config()
                                             csv_filename = f"prescreened_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                                             if save_csv_to_sharepoint(sp, filtered_df, csv_filename):
                                                 st.success("✅ Pre-screened candidates saved to SharePoint!")
 
                                 st.info(f"🎯 Now analysing top {top_n} candidates from the pre-screened pool…")
                                 with st.spinner(f"Analysing top {top_n} candidates…"):
-                                    results = match_candidates_with_jd(client, filtered_df, job_desc, top_n)
+                                    match_status = st.empty()
+                                    results = match_candidates_sharded(
+                                        client, filtered_df, job_desc, top_n,
+                                        on_progress=_stream_progress(match_status, "Ranking candidates"),
+                                    )
+                                    match_status.empty()
                                     if results:
                                         st.session_state.matched_results = results
+                                        st.session_state.interview_questions = {}
                                         st.success(f"✅ Successfully ranked top {len(results)} candidates!")
                             else:
                                 st.warning("⚠️ No candidates passed the pre-screening criteria. Consider adjusting the job requirements or uploading more resumes.")
@@ -530,6 +694,10 @@ def render_matching_tab():
             st.subheader(f"🏆 Top {len(st.session_state.matched_results)} Recommended Candidates")
             st.info(f"📊 Showing top {len(st.session_state.matched_results)} candidates as per HR's selected number")
 
+            if st.button("🎤 Generate Interview Questions for All", key="q_all"):
+                with st.spinner("Generating personalised interview questions…"):
+                    _generate_all_interview_questions(client, job_desc)
+
             for cand in st.session_state.matched_results:
                 rank = cand.get('rank', 0)
                 name = cand.get('name', 'Unknown')
@@ -542,35 +710,35 @@ def render_matching_tab():
                 rec = cand.get('recommendation', 'N/A')
                 priority = cand.get('interview_priority', 'Medium')
 
-                color = "#66BB6A" if final_score >= 80 else ("#FFA726" if final_score >= 60 else "#EF5350")
+                tier = "high" if final_score >= 80 else ("mid" if final_score >= 60 else "low")
 
+                # Styling lives in CUSTOM_CSS; each card only carries its content
                 st.markdown(f"""
-                <div style="border-left: 5px solid {color}; padding: 20px; margin: 15px 0; background: #FAFAFA;
-                            border-radius: 10px; box-shadow: 0 2px 4px rgba(0,0,0,0.08);">
-                    <h3 style="font-size: 18px;">#{rank} - {name}
-                        <span style="float: right; color: {color}; font-size: 1.8rem;">{final_score}%</span>
-                    </h3>
-                    <p style="font-size: 16px; color: #555; margin-top: 5px;">📧 {email}</p>
-                    <p style="font-size: 16px;"><strong>🎯 {rec}</strong> | <strong>⚡ Interview Priority: {priority}</strong></p>
-                    <p style="font-size: 15px; color: #666; margin-top: 10px;">
-                        <strong>Match Score:</strong> {match}% | <strong>Resume-JD Compatibility:</strong> {semantic_score}%
-                    </p>
+                <div class="cand-card cand-score-{tier}">
+                    <h3>#{rank} - {name} <span class="cand-score">{final_score}%</span></h3>
+                    <p class="cand-email">📧 {email}</p>
+                    <p><strong>🎯 {rec}</strong> | <strong>⚡ Interview Priority: {priority}</strong></p>
+                    <p class="cand-scores"><strong>Match Score:</strong> {match}% | <strong>Resume-JD Compatibility:</strong> {semantic_score}%</p>
                 </div>
                 """, unsafe_allow_html=True)
 
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.markdown("**✅ Key Strengths:**")
-                    for item in format_strengths_weaknesses(strengths):
-                        st.markdown(f'<div class="strength-item" style="font-size: 15px;">• {item}</div>', unsafe_allow_html=True)
+                    strength_html = ''.join(
+                        f'<div class="strength-item">• {item}</div>'
+                        for item in format_strengths_weaknesses(strengths)
+                    )
+                    st.markdown(f"**✅ Key Strengths:**\n\n{strength_html}", unsafe_allow_html=True)
                 with col2:
-                    st.markdown("**⚠️ Areas for Consideration:**")
                     weakness_items = format_strengths_weaknesses(gaps)
                     if weakness_items and gaps != "None":
-                        for item in weakness_items:
-                            st.markdown(f'<div class="weakness-item" style="font-size: 15px;">• {item}</div>', unsafe_allow_html=True)
+                        weakness_html = ''.join(
+                            f'<div class="weakness-item">• {item}</div>'
+                            for item in weakness_items
+                        )
                     else:
-                        st.markdown('<div class="strength-item" style="font-size: 15px;">• No significant gaps identified</div>', unsafe_allow_html=True)
+                        weakness_html = '<div class="strength-item">• No significant gaps identified</div>'
+                    st.markdown(f"**⚠️ Areas for Consideration:**\n\n{weakness_html}", unsafe_allow_html=True)
 
                 cand_full = st.session_state.candidates_df[st.session_state.candidates_df['name'] == name]
                 if not cand_full.empty:
@@ -590,38 +758,23 @@ def render_matching_tab():
                         st.write(f"**💻 Technical Skills:** {cand_data.get('tech_stack')}")
                         st.write(f"**🚀 Key Projects:** {cand_data.get('key_projects')}")
 
-                        if st.button(f"🎤 Generate Interview Questions", key=f"q_{rank}"):
-                            with st.spinner("Generating personalised interview questions…"):
-                                questions = generate_interview_questions(client, cand_data, job_desc)
-                                if questions:
-                                    st.markdown("---")
-                                    st.subheader(f"Interview Questions for {name}")
-                                    for idx, q in enumerate(questions, 1):
-                                        st.markdown(f"""
-                                        **Question {idx} ({q.get('category')}):**
-                                        {q.get('question')}
-                                        *💡 Why we're asking: {q.get('why_asking')}*
-                                        """)
-                                        st.divider()
+                        _interview_questions_block(client, cand_data, job_desc, rank, name)
 
                 st.markdown("---")
 
             results_df = pd.DataFrame(st.session_state.matched_results)
             col1, col2 = st.columns(2)
             with col1:
-                csv_buffer = io.StringIO()
-                results_df.to_csv(csv_buffer, index=False)
                 st.download_button(
                     "📊 Download Matching Results (CSV)",
-                    csv_buffer.getvalue(),
+                    _df_to_csv_bytes(results_df),
                     f"top_{len(st.session_state.matched_results)}_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                     "text/csv",
                     use_container_width=True,
                 )
             with col2:
-                if _sp_connected():
+                if sp_connected:
                     if st.button("☁️ Save Matching Results to SharePoint", use_container_width=True):
-                        sp = _sp_config()
                         csv_filename = f"top_{len(st.session_state.matched_results)}_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                         if save_csv_to_sharepoint(sp, results_df, csv_filename):
                             st.success("✅ Matching results saved to SharePoint!")
@@ -630,24 +783,143 @@ def render_matching_tab():
 
 
 # ── Analytics Tab ──────────────────────────────────────────────────────────────
+# plotly is imported inside the figure builders so it only loads when a chart is drawn
+
+@st.cache_data(show_spinner=False)
+def _experience_fig(labels, counts):
+    import plotly.express as px
+    fig = px.bar(
+        x=list(labels),
+        y=list(counts),
+        labels={'x': 'Experience Range', 'y': 'Number of Candidates'},
+        color=list(counts),
+        color_continuous_scale='Blues',
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _match_scores_fig(names, scores):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Bar(
+        x=list(scores), y=list(names), orientation='h',
+        marker=dict(
+            color=list(scores),
+            colorscale=[[0, '#FFCDD2'], [0.5, '#FFE082'], [1, '#C8E6C9']],
+            showscale=True, colorbar=dict(title="Score"),
+        ),
+        text=[f"{s}%" for s in scores], textposition='outside',
+    )])
+    fig.update_layout(
+        xaxis_title="Match Score (%)", yaxis_title="Candidate",
+        yaxis=dict(autorange="reversed"),
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _skills_fig(skill_names, skill_percentages, hover_texts):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Bar(
+        y=skill_names[::-1], x=skill_percentages[::-1], orientation='h',
+        marker=dict(
+            color=skill_percentages[::-1], colorscale='Tealgrn', showscale=True,
+            colorbar=dict(title="Coverage %", titleside="right", ticksuffix="%"),
+        ),
+        text=[f"{p:.1f}%" for p in skill_percentages[::-1]], textposition='outside',
+        hovertext=hover_texts[::-1], hovertemplate='%{hovertext}<extra></extra>',
+    )])
+    fig.update_layout(
+        xaxis_title="Percentage of Candidates (%)", yaxis_title="Skill",
+        height=600, margin=dict(l=150),
+        hoverlabel=dict(bgcolor="white", font_size=15, font_family="Arial",
+                        font_color="black", bordercolor="#BDBDBD", align="left"),
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _timeline_fig(timeline):
+    import plotly.express as px
+    fig = px.line(timeline, x='Date', y='Count', markers=True, labels={'Count': 'Resumes Received'})
+    fig.update_traces(line_color='#64B5F6', marker=dict(size=8, color='#42A5F5'))
+    fig.update_layout(hovermode='x unified',
+                      hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial"))
+    return fig
+
+
+# Chart data is derived in cached helpers so reruns with the same pool skip the pandas work
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _experience_distribution(experience_years):
+    exp_bins = pd.cut(
+        experience_years.astype(float),
+        bins=[0, 2, 5, 10, 20],
+        labels=['0-2 years', '2-5 years', '5-10 years', '10+ years'],
+        ordered=True,
+    )
+    # Counts of an ordered categorical come back in bin order without sorting
+    exp_counts = exp_bins.value_counts(sort=False)
+    return tuple(exp_counts.index.astype(str)), tuple(exp_counts.values.tolist())
+
+
+def _explode_skills(tech_stack):
+    """One lowercased, stripped skill per row (index repeats per candidate), blanks dropped."""
+    skills = tech_stack.str.lower().str.split(',').explode().str.strip()
+    return skills[(skills != '') & (skills != 'nan')]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _unique_skill_count(tech_stack):
+    return int(_explode_skills(tech_stack).nunique())
+
+
+def _skill_hover(skill_name, pct, count, candidates, total_candidates):
+    """Hover label for one skill bar: coverage plus up to 8 candidate names."""
+    more = f"<br>   • …and {len(candidates) - 8} more" if len(candidates) > 8 else ""
+    return (
+        f"<b>{skill_name}</b><br><br><b>Coverage:</b> {pct:.1f}% ({count}/{total_candidates})"
+        f"<br><br><b>Candidates:</b><br>   • " + '<br>   • '.join(candidates[:8]) + more
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _skill_coverage(tech_stack, names):
+    """Top 15 skills as (names, coverage percentages, hover texts) for _skills_fig."""
+    skills = _explode_skills(tech_stack)
+    skill_rows = pd.DataFrame({'skill': skills, 'name': names.reindex(skills.index)})
+
+    # Count every skill, but only collect candidate names for the 15 that are charted
+    total_candidates = len(tech_stack)
+    skill_counts = skill_rows['skill'].value_counts(sort=False).sort_values(ascending=False, kind='stable')
+    sorted_skills = list(skill_counts.head(15).items())
+    top_skill_rows = skill_rows[skill_rows['skill'].isin(skill_counts.index[:15])]
+    skill_candidates = top_skill_rows.groupby('skill', sort=False)['name'].agg(list)
+
+    skill_names = [skill.title() for skill, _ in sorted_skills]
+    skill_percentages = [count / total_candidates * 100 for _, count in sorted_skills]
+    hover_texts = [
+        _skill_hover(name, pct, count, skill_candidates[skill], total_candidates)
+        for (skill, count), name, pct in zip(sorted_skills, skill_names, skill_percentages)
+    ]
+
+    return tuple(skill_names), tuple(skill_percentages), tuple(hover_texts)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _submission_timeline(submission_date):
+    timeline = submission_date.groupby(submission_date.dt.date).size()
+    return timeline.rename_axis('Date').reset_index(name='Count')
+
 
 def render_analytics_tab():
     """Render the Recruitment Analytics Dashboard tab"""
     st.header("📈 Recruitment Analytics Dashboard")
 
-    use_date_filter = st.session_state.get('use_date_filter', False)
-    start_date = st.session_state.get('start_date')
-    end_date = st.session_state.get('end_date')
-
     if st.session_state.candidates_df is not None:
-        df = st.session_state.candidates_df.copy()
-
-        if use_date_filter and start_date and end_date:
-            try:
-                df['submission_date'] = pd.to_datetime(df['submission_date'])
-                df = df[(df['submission_date'].dt.date >= start_date) & (df['submission_date'].dt.date <= end_date)]
-            except Exception:
-                pass
+        df = _apply_date_filter(st.session_state.candidates_df)
+        tech_stack = tech_stack_text(df)
 
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -659,110 +931,34 @@ def render_analytics_tab():
             else:
                 st.metric("Avg Match Score", "N/A")
         with col3:
-            unique_skills = len(set(', '.join(df['tech_stack'].astype(str)).split(', ')))
-            st.metric("Unique Skills in Pool", unique_skills)
+            st.metric("Unique Skills in Pool", _unique_skill_count(tech_stack))
 
         st.divider()
 
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Experience Distribution")
-            exp_bins = pd.cut(
-                df['experience_years'].astype(float),
-                bins=[0, 2, 5, 10, 20],
-                labels=['0-2 years', '2-5 years', '5-10 years', '10+ years'],
-            )
-            exp_counts = exp_bins.value_counts().sort_index()
-            fig = px.bar(
-                x=exp_counts.index.astype(str),
-                y=exp_counts.values,
-                labels={'x': 'Experience Range', 'y': 'Number of Candidates'},
-                color=exp_counts.values,
-                color_continuous_scale='Blues',
-            )
-            fig.update_layout(showlegend=False)
+            fig = _experience_fig(*_experience_distribution(df['experience_years']))
             st.plotly_chart(fig, use_container_width=True)
 
         with col2:
             if st.session_state.matched_results:
                 st.subheader("Candidate Match Scores")
-                scores = [c['final_score'] for c in st.session_state.matched_results]
-                names = [c['name'] for c in st.session_state.matched_results]
-                fig = go.Figure(data=[go.Bar(
-                    x=scores, y=names, orientation='h',
-                    marker=dict(
-                        color=scores,
-                        colorscale=[[0, '#FFCDD2'], [0.5, '#FFE082'], [1, '#C8E6C9']],
-                        showscale=True, colorbar=dict(title="Score"),
-                    ),
-                    text=[f"{s}%" for s in scores], textposition='outside',
-                )])
-                fig.update_layout(
-                    xaxis_title="Match Score (%)", yaxis_title="Candidate",
-                    yaxis=dict(autorange="reversed"),
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                scores = tuple(c['final_score'] for c in st.session_state.matched_results)
+                names = tuple(c['name'] for c in st.session_state.matched_results)
+                st.plotly_chart(_match_scores_fig(names, scores), use_container_width=True)
             else:
                 st.info("Run matching to see compatibility scores")
 
         st.subheader("Top Skills in Candidate Pool")
-        skill_candidates = {}
-        for _, row in df.iterrows():
-            skills = str(row.get('tech_stack', '')).lower().split(',')
-            candidate_name = row.get('name', 'Unknown')
-            for skill in skills:
-                skill = skill.strip()
-                if skill and skill != 'nan':
-                    skill_candidates.setdefault(skill, []).append(candidate_name)
-
-        total_candidates = len(df)
-        skill_counts = {skill: len(cands) for skill, cands in skill_candidates.items()}
-        sorted_skills = sorted(skill_counts.items(), key=lambda x: x[1], reverse=True)[:15]
-
-        skill_names = [s[0].title() for s in sorted_skills]
-        skill_values = [s[1] for s in sorted_skills]
-        skill_percentages = [(s[1] / total_candidates * 100) for s in sorted_skills]
-
-        hover_texts = []
-        for idx, skill_name in enumerate([s[0] for s in sorted_skills]):
-            candidates = skill_candidates[skill_name]
-            pct = skill_percentages[idx]
-            count = skill_values[idx]
-            if len(candidates) <= 8:
-                clist = '<br>   • '.join(candidates)
-                hover_texts.append(f"<b>{skill_name.title()}</b><br><br><b>Coverage:</b> {pct:.1f}% ({count}/{total_candidates})<br><br><b>Candidates:</b><br>   • {clist}")
-            else:
-                clist = '<br>   • '.join(candidates[:8])
-                hover_texts.append(f"<b>{skill_name.title()}</b><br><br><b>Coverage:</b> {pct:.1f}% ({count}/{total_candidates})<br><br><b>Candidates:</b><br>   • {clist}<br>   • …and {len(candidates)-8} more")
-
-        fig = go.Figure(data=[go.Bar(
-            y=skill_names[::-1], x=skill_percentages[::-1], orientation='h',
-            marker=dict(
-                color=skill_percentages[::-1], colorscale='Tealgrn', showscale=True,
-                colorbar=dict(title="Coverage %", titleside="right", ticksuffix="%"),
-            ),
-            text=[f"{p:.1f}%" for p in skill_percentages[::-1]], textposition='outside',
-            hovertext=hover_texts[::-1], hovertemplate='%{hovertext}<extra></extra>',
-        )])
-        fig.update_layout(
-            xaxis_title="Percentage of Candidates (%)", yaxis_title="Skill",
-            height=600, margin=dict(l=150),
-            hoverlabel=dict(bgcolor="white", font_size=15, font_family="Arial",
-                            font_color="black", bordercolor="#BDBDBD", align="left"),
-        )
+        names = df['name'] if 'name' in df.columns else pd.Series('Unknown', index=df.index)
+        fig = _skills_fig(*_skill_coverage(tech_stack, names))
         st.plotly_chart(fig, use_container_width=True)
 
         if 'submission_date' in df.columns:
             st.subheader("Resume Submission Timeline")
             try:
-                df['submission_date'] = pd.to_datetime(df['submission_date'])
-                timeline = df.groupby(df['submission_date'].dt.date).size().reset_index()
-                timeline.columns = ['Date', 'Count']
-                fig = px.line(timeline, x='Date', y='Count', markers=True, labels={'Count': 'Resumes Received'})
-                fig.update_traces(line_color='#64B5F6', marker=dict(size=8, color='#42A5F5'))
-                fig.update_layout(hovermode='x unified',
-                                  hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial"))
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(_timeline_fig(_submission_timeline(_submission_dates(df))), use_container_width=True)
             except Exception:
                 pass
     else:
@@ -0,0 +1,51 @@
+"""
+Local Parquet store for the last parsed candidate batch
+Lets a restarted app reload it on request without re-parsing resumes.
+Only the parsed candidate records are stored, never the raw resume text.
+"""
+
+import os
+import json
+import pandas as pd
+
+CANDIDATE_STORE_PATH = os.getenv("CANDIDATE_STORE_PATH", ".cache/candidates.parquet")
+
+
+def save_candidates(parsed_resumes: list, resume_metadata: dict) -> None:
+    """Persist the parsed batch; parsed records are kept as JSON since their shape varies."""
+    rows = []
+    for parsed in parsed_resumes:
+        name = parsed.get('name', '')
+        rows.append({
+            'name': name,
+            'record': json.dumps(parsed, default=str),
+            'metadata': json.dumps(resume_metadata.get(name, {}), default=str),
+        })
+
+    try:
+        os.makedirs(os.path.dirname(CANDIDATE_STORE_PATH) or ".", exist_ok=True)
+        pd.DataFrame(rows, columns=['name', 'record', 'metadata']).to_parquet(
+            CANDIDATE_STORE_PATH, index=False, compression="zstd"
+        )
+    except (OSError, ImportError, ValueError):
+        pass
+
+
+def has_saved_candidates() -> bool:
+    return os.path.exists(CANDIDATE_STORE_PATH)
+
+
+def load_candidates():
+    """Return (parsed_resumes, resume_metadata), or None if nothing is stored."""
+    if not has_saved_candidates():
+        return None
+    try:
+        df = pd.read_parquet(CANDIDATE_STORE_PATH, columns=['name', 'record', 'metadata'])
+    except (OSError, ImportError, ValueError):
+        return None
+
+    parsed_resumes = [json.loads(record) for record in df['record']]
+    resume_metadata = {
+        name: meta for name, meta in zip(df['name'], map(json.loads, df['metadata'])) if meta
+    }
+    return parsed_resumes, resume_metadata
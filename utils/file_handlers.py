@@ -3,18 +3,79 @@ File handling utilities for PDF and DOCX extraction
 """
 
 import streamlit as st
-import PyPDF2
-import docx2txt
 import io
+import os
+import hashlib
+import threading
+import pandas as pd
+import importlib.util
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# PDFium (native) is much faster than PyPDF2's pure-Python parser; PyPDF2 stays as the fallback.
+# The readers import their libraries on first use so app start-up does not pay for them.
+PDFIUM_AVAILABLE = importlib.util.find_spec("pypdfium2") is not None
+# PDFium is not thread-safe, and Streamlit runs each session's script on its own thread
+_PDFIUM_LOCK = threading.Lock()
+
+# Form feed between PDF pages, so page headers / footers can be told apart from body lines
+PAGE_BREAK = "\x0c"
+
+# Extraction worker processes, started once and shared by every session
+EXTRACT_MAX_WORKERS = int(os.getenv("EXTRACT_MAX_WORKERS", "0")) or os.cpu_count() or 1
+_EXTRACT_POOL = None
+_EXTRACT_POOL_LOCK = threading.Lock()
+
+# Extracted text keyed by (sha256 of file bytes, file name), least recently used evicted first
+TEXT_CACHE_MAX_ENTRIES = 500
+_TEXT_CACHE = OrderedDict()
+# Session script threads read and evict concurrently
+_TEXT_CACHE_LOCK = threading.Lock()
+
+
+def _read_pdf_pypdf2(pdf_file):
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    return PAGE_BREAK.join(page.extract_text() + "\n" for page in pdf_reader.pages)
+
+
+def _read_pdf_pdfium(pdf_bytes):
+    import pypdfium2 as pdfium
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            pages = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range() + "\n")
+                textpage.close()
+                page.close()
+            return PAGE_BREAK.join(pages)
+        finally:
+            pdf.close()
+
+
+def _read_pdf(pdf_file):
+    if not PDFIUM_AVAILABLE:
+        return _read_pdf_pypdf2(pdf_file)
+    pdf_bytes = pdf_file.read()
+    try:
+        return _read_pdf_pdfium(pdf_bytes)
+    except Exception:
+        return _read_pdf_pypdf2(io.BytesIO(pdf_bytes))
+
+
+def _read_docx(docx_file):
+    import docx2txt
+    return docx2txt.process(docx_file)
+
 
 def extract_text_from_pdf(pdf_file):
     """Extract text from PDF file"""
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return _read_pdf(pdf_file)
     except Exception as e:
         st.error(f"Error reading PDF: {str(e)}")
         return ""
@@ -22,8 +83,7 @@ def extract_text_from_pdf(pdf_file):
 def extract_text_from_docx(docx_file):
     """Extract text from DOCX file"""
     try:
-        text = docx2txt.process(docx_file)
-        return text
+        return _read_docx(docx_file)
     except Exception as e:
         st.error(f"Error reading DOCX: {str(e)}")
         return ""
@@ -36,11 +96,155 @@ def extract_text_from_file(uploaded_file):
     else:  # Regular upload
         file_ext = uploaded_file.name.split('.')[-1].lower()
         file_content = uploaded_file
-    
+
     if file_ext == 'pdf':
         return extract_text_from_pdf(file_content)
     elif file_ext == 'docx':
         return extract_text_from_docx(file_content)
     else:
         st.warning(f"⚠️ Unsupported file format: {file_ext}. Please upload PDF or DOCX files only.")
-        return ""
\ No newline at end of file
+        return ""
+
+
+def _extract_text_from_bytes(file_bytes, file_name):
+    """
+    Process-pool worker: extract text without touching Streamlit.
+    Returns (text, level, message) where level is the st call to report with.
+    """
+    file_ext = file_name.split('.')[-1].lower()
+    try:
+        if file_ext == 'pdf':
+            return _read_pdf(io.BytesIO(file_bytes)), None, None
+        if file_ext == 'docx':
+            return _read_docx(io.BytesIO(file_bytes)), None, None
+    except Exception as e:
+        return "", "error", f"Error reading {file_ext.upper()}: {str(e)}"
+    return "", "warning", f"⚠️ Unsupported file format: {file_ext}. Please upload PDF or DOCX files only."
+
+
+def _text_cache_key(file_bytes, file_name):
+    return hashlib.sha256(file_bytes).hexdigest(), file_name
+
+
+def _recall_text(key):
+    with _TEXT_CACHE_LOCK:
+        text = _TEXT_CACHE.get(key)
+        if text is not None:
+            _TEXT_CACHE.move_to_end(key)
+        return text
+
+
+def _remember_text(key, text):
+    if not text:
+        return
+    with _TEXT_CACHE_LOCK:
+        _TEXT_CACHE[key] = text
+        while len(_TEXT_CACHE) > TEXT_CACHE_MAX_ENTRIES:
+            _TEXT_CACHE.popitem(last=False)
+
+
+def extract_text_cached(file_bytes, file_name):
+    """Extract text from raw file bytes, memoised on (content hash, name)."""
+    return extract_texts_parallel([(file_bytes, file_name)])[0]
+
+
+def _extract_pool():
+    """
+    The shared extraction pool, created on first use. Workers are spawned,
+    not forked: forking the multi-threaded Streamlit server can copy locks
+    held by other threads into the child and deadlock it.
+    """
+    global _EXTRACT_POOL
+    with _EXTRACT_POOL_LOCK:
+        if _EXTRACT_POOL is None:
+            _EXTRACT_POOL = ProcessPoolExecutor(
+                max_workers=EXTRACT_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _EXTRACT_POOL
+
+
+def _discard_extract_pool(pool):
+    """Drop a broken pool (e.g. a worker was killed) so the next call starts a fresh one."""
+    global _EXTRACT_POOL
+    with _EXTRACT_POOL_LOCK:
+        if _EXTRACT_POOL is pool:
+            _EXTRACT_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_texts_parallel(files, on_extracted=None):
+    """
+    Extract text from (file_bytes, file_name) pairs across CPU cores, in the shared worker pool.
+    Files seen before (same content hash and name) are served from memory.
+    on_extracted(done, total, file_name) is called on the main thread as each file finishes.
+    Returns the texts in input order; failures are reported and yield "".
+    """
+    keys = [_text_cache_key(*f) for f in files]
+    texts = [_recall_text(key) for key in keys]
+    pending = [i for i, text in enumerate(texts) if text is None]
+    done = len(files) - len(pending)
+
+    def _finish(i, result):
+        nonlocal done
+        text, level, message = result
+        if message:
+            getattr(st, level)(message)
+        _remember_text(keys[i], text)
+        texts[i] = text
+        done += 1
+        if on_extracted:
+            on_extracted(done, len(files), files[i][1])
+
+    if len(pending) > 1:
+        pool = _extract_pool()
+        try:
+            futures = {pool.submit(_extract_text_from_bytes, *files[i]): i for i in pending}
+            for future in as_completed(futures):
+                _finish(futures[future], future.result())
+        except BrokenProcessPool:
+            _discard_extract_pool(pool)
+        # Whatever the pool did not finish is extracted in this process
+        pending = [i for i in pending if texts[i] is None]
+
+    for i in pending:
+        _finish(i, _extract_text_from_bytes(*files[i]))
+    return texts
+
+
+def _arrow_csv_safe(df):
+    """
+    Columns whose values Arrow writes differently from pandas rule it out:
+    floats (85.0 is written as 85 and reads back as an integer), timestamps,
+    booleans and categories.
+    """
+    return not any(
+        pd.api.types.is_float_dtype(dtype)
+        or pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype)
+        or pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype)
+        for dtype in df.dtypes
+    )
+
+
+def dataframe_to_csv_bytes(df):
+    """
+    Serialise df to UTF-8 CSV bytes. Uses Arrow's C++ CSV writer when every
+    column holds integers or strings, otherwise (or without pyarrow)
+    DataFrame.to_csv. The two are not byte-identical: Arrow quotes the
+    header and every string field, while pandas quotes only fields that
+    need it. Both read back to the same values.
+    Both paths encode straight into one byte buffer, never holding the CSV as a str.
+    """
+    buf = io.BytesIO()
+    if _arrow_csv_safe(df):
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+
+            pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+            return buf.getvalue()
+        except (ImportError, TypeError, ValueError, NotImplementedError):
+            # Arrow's conversion errors subclass these, e.g. mixed-type object columns
+            buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding='utf-8')
+    return buf.getvalue()
@@ -3,46 +3,189 @@ Groq Client Initialization - with primary/fallback API key support
 """
 
 import streamlit as st
-from groq import Groq, AuthenticationError, APIStatusError
+import json
+from groq import Groq, AsyncGroq, AuthenticationError, APIStatusError
+from config.settings import GROQ_MAX_RETRIES
+
+# orjson parses model output several times faster than the stdlib; optional
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+_JSON_CLOSERS = {'{': '}', '[': ']'}
+_JSON_DECODER = json.JSONDecoder()
+
+
+def parse_json_response(text: str, opener: str = '{'):
+    """
+    Parse the outermost JSON object ('{') or array ('[') embedded in a model
+    response. Returns None when the response contains no such span; invalid
+    JSON raises ValueError.
+
+    The span from the first opener to the last closer is tried first. If
+    the model added trailing text with its own braces, the value is decoded
+    from the first opener up to where it ends instead.
+    """
+    json_start = text.find(opener)
+    json_end = text.rfind(_JSON_CLOSERS[opener]) + 1
+    if json_start == -1 or json_end <= json_start:
+        return None
+    try:
+        return _json_loads(text[json_start:json_end])
+    except ValueError as err:
+        try:
+            return _JSON_DECODER.raw_decode(text, json_start)[0]
+        except ValueError:
+            raise err from None
 
 
 def init_groq_client(api_key: str):
     """Initialize and cache Groq client (no fallback)."""
-    return Groq(api_key=api_key)
+    return Groq(api_key=api_key, max_retries=GROQ_MAX_RETRIES)
+
+
+def init_async_groq_client(client):
+    """Build an AsyncGroq client sharing the API key of a sync client (or None)."""
+    if client is None:
+        return None
+    return AsyncGroq(api_key=client.api_key, max_retries=client.max_retries)
+
+
+def _use_fallback(primary_err, fallback_client):
+    """Announce the switch to the fallback key after `primary_err`; re-raise it when none is configured."""
+    if fallback_client is None:
+        raise primary_err
+    if isinstance(primary_err, (AuthenticationError, APIStatusError)):
+        message = f"⚠️ Primary Groq key failed ({type(primary_err).__name__}). Switching to fallback key…"
+    else:
+        message = f"⚠️ Primary Groq key encountered an error ({primary_err}). Trying fallback key…"
+    st.warning(message, icon="🔄")
 
 
 def create_groq_completion(client, fallback_client, **kwargs):
     """
     Attempt a chat completion with the primary client.
-    If it fails due to auth / rate-limit / quota, transparently retry
-    with the fallback client (if one is configured).
+    If it fails (auth, rate limit, quota or any other error), transparently
+    retry with the fallback client (if one is configured).
 
     All kwargs are forwarded directly to client.chat.completions.create().
     Returns the response object.
     """
     try:
         return client.chat.completions.create(**kwargs)
-    except (AuthenticationError, APIStatusError) as primary_err:
-        if fallback_client is None:
-            raise
-
-        st.warning(
-            f"⚠️ Primary Groq key failed ({type(primary_err).__name__}). "
-            "Switching to fallback key…",
-            icon="🔄",
-        )
-        try:
-            return fallback_client.chat.completions.create(**kwargs)
-        except Exception as fallback_err:
-            st.error(f"❌ Fallback key also failed: {fallback_err}")
-            raise fallback_err
-    except Exception as e:
-        # For any other error try fallback before giving up
-        if fallback_client is None:
-            raise
-        st.warning(
-            f"⚠️ Primary Groq key encountered an error ({e}). "
-            "Trying fallback key…",
-            icon="🔄",
-        )
-        return fallback_client.chat.completions.create(**kwargs)
\ No newline at end of file
+    except Exception as primary_err:
+        _use_fallback(primary_err, fallback_client)
+    try:
+        return fallback_client.chat.completions.create(**kwargs)
+    except Exception as fallback_err:
+        st.error(f"❌ Fallback key also failed: {fallback_err}")
+        raise
+
+
+async def create_groq_completion_async(client, fallback_client, **kwargs):
+    """create_groq_completion for AsyncGroq clients."""
+    try:
+        return await client.chat.completions.create(**kwargs)
+    except Exception as primary_err:
+        _use_fallback(primary_err, fallback_client)
+    try:
+        return await fallback_client.chat.completions.create(**kwargs)
+    except Exception as fallback_err:
+        st.error(f"❌ Fallback key also failed: {fallback_err}")
+        raise
+
+
+class _JsonEndDetector:
+    """
+    Watches streamed text for the end of the first top-level JSON value
+    opened by `opener`, skipping brackets inside string literals.
+    """
+
+    def __init__(self, opener):
+        self.opener = opener
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text):
+        """Consume a chunk; True once the value has closed."""
+        for ch in text:
+            if self.depth == 0:
+                if ch == self.opener:
+                    self.depth = 1
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+
+class _StreamCollector:
+    """
+    Assembles the text of a streamed completion. `on_delta` is called with
+    the number of characters received so far; with `stop_after_json` set to
+    '{' or '[', add() reports when that JSON value is complete so the stream
+    can be closed instead of waiting for any trailing prose.
+    """
+
+    def __init__(self, on_delta=None, stop_after_json=None):
+        self.parts = []
+        self.received = 0
+        self.on_delta = on_delta
+        self.detector = _JsonEndDetector(stop_after_json) if stop_after_json else None
+
+    def add(self, chunk):
+        """Take one stream chunk; True once the awaited JSON value has closed."""
+        if not chunk.choices:
+            return False
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            return False
+        self.parts.append(delta)
+        self.received += len(delta)
+        if self.on_delta:
+            self.on_delta(self.received)
+        return bool(self.detector and self.detector.feed(delta))
+
+    def text(self):
+        return ''.join(self.parts)
+
+
+def stream_groq_completion(client, fallback_client, on_delta=None, stop_after_json=None, **kwargs):
+    """Stream a chat completion and return the message text (see _StreamCollector)."""
+    collector = _StreamCollector(on_delta, stop_after_json)
+    stream = create_groq_completion(client, fallback_client, stream=True, **kwargs)
+    try:
+        for chunk in stream:
+            if collector.add(chunk):
+                break
+    finally:
+        stream.close()
+    return collector.text()
+
+
+async def stream_groq_completion_async(client, fallback_client, on_delta=None, stop_after_json=None,
+                                       **kwargs):
+    """stream_groq_completion for AsyncGroq clients."""
+    collector = _StreamCollector(on_delta, stop_after_json)
+    stream = await create_groq_completion_async(client, fallback_client, stream=True, **kwargs)
+    try:
+        async for chunk in stream:
+            if collector.add(chunk):
+                break
+    finally:
+        await stream.close()
+    return collector.text()
@@ -0,0 +1,81 @@
+"""
+Persistent LLM response cache backed by SQLite
+Identical requests (same model, prompt and input) skip the Groq call.
+"""
+
+import streamlit as st
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+
+# Bump when prompt post-processing changes so stale entries are ignored
+PROMPT_VERSION = 1
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(LLM_CACHE_PATH, timeout=10)
+    try:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            yield conn
+    finally:
+        conn.close()
+
+
+def llm_cache_enabled() -> bool:
+    return st.session_state.get('use_llm_cache', True)
+
+
+def make_cache_key(request: dict, *inputs) -> str:
+    """SHA-256 over the completion request, prompt version and raw inputs."""
+    payload = json.dumps(
+        {"version": PROMPT_VERSION, "request": request, "inputs": inputs},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def read_llm_cache(key: str, ttl: float = None):
+    """Return the cached response text for key, or None on miss / disabled."""
+    if not llm_cache_enabled():
+        return None
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None or (ttl is not None and time.time() - row[1] > ttl):
+        return None
+    return row[0]
+
+
+def write_llm_cache(key: str, response: str) -> None:
+    if not llm_cache_enabled():
+        return
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+    except sqlite3.Error:
+        pass
+
+
+def clear_llm_cache() -> None:
+    try:
+        with _connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+    except sqlite3.Error:
+        pass
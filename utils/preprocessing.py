@@ -5,38 +5,143 @@ Resume preprocessing and parsing utilities
 import streamlit as st
 import re
 import json
+import asyncio
+import hashlib
+from collections import Counter, defaultdict
 from datetime import datetime
-from utils.groq_client import create_groq_completion
+from config.settings import GROQ_MAX_CONCURRENCY, RESUME_PARSE_BATCH_SIZE, AGGRESSIVE_TRIM, RESUME_TRIM_CHARS
+from utils.llm_cache import PROMPT_VERSION, make_cache_key, read_llm_cache, write_llm_cache
+from utils.semantic_cache import semantic_lookup, semantic_store
+from utils.groq_client import (
+    stream_groq_completion,
+    init_async_groq_client,
+    stream_groq_completion_async,
+    parse_json_response,
+)
+
+
+# Characters of (normalised) resume text sent to the parser
+RESUME_TEXT_MAX_CHARS = 6000
+RESUME_PARSE_MODEL = "llama-3.3-70b-versatile"
+
+# Short lines repeated at the top / bottom of several pages are page headers / footers
+_HEADER_LINE_MAX_CHARS = 40
+_HEADER_LINE_MIN_PAGES = 2
+_PAGE_EDGE_LINES = 2
+
+_INLINE_SPACE_RE = re.compile(r'[ \t\u00a0]+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+# "Page 3", "Page 3 of 5", "3 of 5" are page numbers anywhere; a bare "3" or "- 3 -" only
+# at a page break, so phone numbers, years and dates on their own line survive
+_PAGE_LABEL_RE = re.compile(r'(?i)^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s+of\s+\d+)$')
+_PAGE_EDGE_NUMBER_RE = re.compile(r'^-?\s*\d{1,3}\s*-?$')
+# Control characters other than newline and tab are dropped; form feeds become line breaks
+_CTRL_TABLE = {c: None for c in range(32) if chr(c) not in '\n\t\x0c\r'}
+_CTRL_TABLE.update({0x7f: None, 0x0c: '\n', 0x0d: '\n'})
+
+
+def _page_edges(lines):
+    """Indexes of the first and last few non-empty lines of a page."""
+    filled = [i for i, line in enumerate(lines) if line]
+    return set(filled[:_PAGE_EDGE_LINES] + filled[-_PAGE_EDGE_LINES:])
+
+
+def normalize_resume(text):
+    """
+    Strip extraction noise so the parser's character budget holds resume
+    content: control characters, page numbers, repeated page headers and
+    runs of whitespace. Line breaks are kept since they mark sections.
+    Headers, footers and bare page numbers are only recognised next to a
+    page break (form feed), never in the body of a page.
+    """
+    pages = [
+        [_INLINE_SPACE_RE.sub(' ', line).strip() for line in page.translate(_CTRL_TABLE).split('\n')]
+        for page in text.replace('\r\n', '\n').split('\x0c')
+    ]
+    edges = [_page_edges(lines) if len(pages) > 1 else set() for lines in pages]
+
+    edge_pages = Counter(
+        line
+        for lines, edge in zip(pages, edges)
+        for line in {lines[i] for i in edge}
+        if len(line) < _HEADER_LINE_MAX_CHARS
+    )
+    repeated = {line for line, count in edge_pages.items() if count >= _HEADER_LINE_MIN_PAGES}
+
+    kept, seen = [], set()
+    for lines, edge in zip(pages, edges):
+        for i, line in enumerate(lines):
+            if _PAGE_LABEL_RE.match(line):
+                continue
+            if i in edge:
+                if _PAGE_EDGE_NUMBER_RE.match(line):
+                    continue
+                if line in repeated:
+                    if line in seen:
+                        continue
+                    seen.add(line)
+            kept.append(line)
+
+    return _BLANK_LINES_RE.sub('\n\n', '\n'.join(kept)).strip()
+
+
+# Contact lines are kept on their own; section headings also keep the lines under them
+_CONTACT_HINT_RE = re.compile(r'(?i)@|\b(phone|mobile|tel|linkedin)\b')
+_SECTION_HINT_RE = re.compile(
+    r'(?i)\b(experience|employment|work history|education|degree|university|skills?|'
+    r'technologies|tech stack|tools|projects?|certifications?)\b'
+)
+_HEADER_LINES = 5
+_SECTION_LINES_AFTER = 8
+
+
+def focus_resume_text(text, budget=RESUME_TRIM_CHARS):
+    """
+    Cut a long resume down to about `budget` characters, keeping the top
+    header, contact lines and section lines (experience, education, skills,
+    projects). The lines under each section are added round-robin, so
+    every section gets a share of the budget. Resumes that fit, or have no
+    section lines, are returned whole or truncated.
+    """
+    if len(text) <= budget:
+        return text
+    lines = text.split('\n')
+    sections = [i for i, line in enumerate(lines) if _SECTION_HINT_RE.search(line)]
+    if not sections:
+        return text[:budget]
+
+    keep = set(range(min(_HEADER_LINES, len(lines))))
+    keep.update(i for i, line in enumerate(lines) if _CONTACT_HINT_RE.search(line))
+    keep.update(sections)
+    size = sum(len(lines[i]) + 1 for i in keep)
+
+    for offset in range(1, _SECTION_LINES_AFTER + 1):
+        for start in sections:
+            i = start + offset
+            if i < len(lines) and i not in keep and size + len(lines[i]) + 1 <= budget:
+                keep.add(i)
+                size += len(lines[i]) + 1
+
+    return '\n'.join(lines[i] for i in sorted(keep))[:budget]
+
+
+# Compiled once; masking and contact extraction run on every resume in a batch
+_EMAIL_MASK_RE = re.compile(r'\S+@\S+')
+_PHONE_MASK_RE = re.compile(r'\+?\d[\d -]{8,12}\d')
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+# Fenced so a phone number is never carved out of a longer digit run (IDs, dates)
+_PHONE_RE = re.compile(r'(?<!\w)(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}(?!\d)')
 
 
 def mask_pii(text):
     """Redacts PII before sending to LLM."""
-    text = re.sub(r'\S+@\S+', '[EMAIL_MASKED]', text)
-    text = re.sub(r'\+?\d[\d -]{8,12}\d', '[PHONE_MASKED]', text)
+    text = _EMAIL_MASK_RE.sub('[EMAIL_MASKED]', text)
+    text = _PHONE_MASK_RE.sub('[PHONE_MASKED]', text)
     return text
 
 
-def parse_resume_with_groq(client, resume_text, filename, mask_pii_enabled=False, upload_date=None):
-    """Parse resume with optional PII masking. Uses fallback Groq key when available."""
-    fallback_client = st.session_state.get('fallback_client')
-
-    # Extract email and phone BEFORE masking
-    email_extracted = None
-    phone_extracted = None
-
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    email_matches = re.findall(email_pattern, resume_text)
-    if email_matches:
-        email_extracted = email_matches[0]
-
-    phone_pattern = r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-    phone_matches = re.findall(phone_pattern, resume_text)
-    if phone_matches:
-        phone_extracted = ''.join(phone_matches[0]) if isinstance(phone_matches[0], tuple) else phone_matches[0]
-
-    processed_text = mask_pii(resume_text) if mask_pii_enabled else resume_text
-    #Structured prompting with strict instructions to ensure deterministic output
-    prompt = """
+# Structured prompting with strict instructions to ensure deterministic output
+RESUME_PARSE_PROMPT = """
 ROLE:
 You are a deterministic AI resume parsing engine.
 
@@ -101,56 +206,346 @@ OUTPUT CONSTRAINTS:
 """
 
 
+# Appended to RESUME_PARSE_PROMPT when several resumes share one request
+RESUME_BATCH_INSTRUCTIONS = """
+BATCH MODE:
+- Several resumes follow, each introduced by a line "--- RESUME <n> ---".
+- Parse every resume independently using the schema and rules above.
+- Return ONLY a JSON array with one object per resume, in the same order.
+- Add an "idx" field to each object holding its resume number <n>.
+"""
 
-    try:
-        chat_completion = create_groq_completion(
-            client,
-            fallback_client,
-            messages=[
-                {"role": "system", "content": "You are a precise resume parser. Extract ALL contact information including email and phone. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.1,
-            max_tokens=1500
-        )
+# Static instructions live in the system message and the resume text alone in the user
+# message, so every parse request (single or batched) starts with the same bytes and
+# the provider's prompt-prefix cache can reuse the prefill
+RESUME_PARSE_SYSTEM_PROMPT = (
+    "You are a precise resume parser. Extract ALL contact information including email and phone.\n"
+    + RESUME_PARSE_PROMPT
+)
+RESUME_BATCH_SYSTEM_PROMPT = RESUME_PARSE_SYSTEM_PROMPT + RESUME_BATCH_INSTRUCTIONS
+
+
+def _extract_contact_details(resume_text):
+    """Extract the first email and phone number before any masking."""
+    email_extracted = None
+    phone_extracted = None
 
-        response = chat_completion.choices[0].message.content.strip()
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-
-        if json_start != -1 and json_end > json_start:
-            parsed_data = json.loads(response[json_start:json_end])
-
-            if mask_pii_enabled:
-                if email_extracted:
-                    parsed_data['email'] = email_extracted
-                if phone_extracted:
-                    parsed_data['phone'] = phone_extracted
-            else:
-                if not parsed_data.get('email') or parsed_data.get('email') == 'null':
-                    parsed_data['email'] = email_extracted if email_extracted else None
-                if not parsed_data.get('phone') or parsed_data.get('phone') == 'null':
-                    parsed_data['phone'] = phone_extracted if phone_extracted else None
-
-            parsed_data['filename'] = filename
-            parsed_data['submission_date'] = upload_date if upload_date else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            return parsed_data
+    email_match = _EMAIL_RE.search(resume_text)
+    if email_match:
+        email_extracted = email_match.group(0)
+
+    phone_match = _PHONE_RE.search(resume_text)
+    if phone_match:
+        phone_extracted = phone_match.group(0)
+
+    return email_extracted, phone_extracted
+
+
+def _prepare_resume_text(resume_text, mask_pii_enabled):
+    """Normalise (and optionally mask) a resume; contacts come from the raw text."""
+    email_extracted, phone_extracted = _extract_contact_details(resume_text)
+    resume_text = normalize_resume(resume_text)
+    if AGGRESSIVE_TRIM:
+        resume_text = focus_resume_text(resume_text)
+    processed_text = mask_pii(resume_text) if mask_pii_enabled else resume_text
+    return processed_text, email_extracted, phone_extracted
+
+
+def _resume_parse_request(resume_text, mask_pii_enabled):
+    """Build the completion kwargs and pre-extracted contacts for one resume."""
+    processed_text, email_extracted, phone_extracted = _prepare_resume_text(resume_text, mask_pii_enabled)
+
+    request = dict(
+        messages=[
+            {"role": "system", "content": RESUME_PARSE_SYSTEM_PROMPT},
+            {"role": "user", "content": f"RESUME:\n{processed_text[:RESUME_TEXT_MAX_CHARS]}"}
+        ],
+        model=RESUME_PARSE_MODEL,
+        temperature=0.1,
+        max_tokens=1500
+    )
+    return request, email_extracted, phone_extracted
+
+
+def _batch_parse_request(processed_texts):
+    """Completion kwargs parsing several prepared resumes in one request."""
+    sections = "\n".join(
+        f"--- RESUME {idx} ---\n{text[:RESUME_TEXT_MAX_CHARS]}"
+        for idx, text in enumerate(processed_texts, start=1)
+    )
+    return dict(
+        messages=[
+            {"role": "system", "content": RESUME_BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": sections}
+        ],
+        model=RESUME_PARSE_MODEL,
+        temperature=0.1,
+        max_tokens=1500 * len(processed_texts)
+    )
+
+
+def _split_batch_response(response, count):
+    """
+    Split a batched parser response into one JSON object string per resume,
+    None where the model skipped or garbled an entry.
+    """
+    try:
+        items = parse_json_response(response, opener='[')
+    except ValueError:
+        return [None] * count
+    if not isinstance(items, list):
+        return [None] * count
+
+    by_idx = {}
+    for item in items:
+        if isinstance(item, dict) and 'idx' in item:
+            by_idx[str(item.pop('idx'))] = item
+    return [
+        json.dumps(by_idx[str(idx)]) if str(idx) in by_idx else None
+        for idx in range(1, count + 1)
+    ]
+
+
+# Finished parse records are cached by resume content; the prompt and model are folded
+# into the key so editing either invalidates old records
+_PARSED_KEY_BASE = hashlib.blake2b(
+    f"{PROMPT_VERSION}\0{RESUME_PARSE_MODEL}\0{RESUME_PARSE_PROMPT}\0"
+    f"{AGGRESSIVE_TRIM and RESUME_TRIM_CHARS}\0".encode("utf-8"),
+    digest_size=16,
+)
+
+
+def _parsed_resume_key(resume_text, mask_pii_enabled):
+    digest = _PARSED_KEY_BASE.copy()
+    digest.update(f"{mask_pii_enabled}\0{resume_text}".encode("utf-8"))
+    return f"parsed:{digest.hexdigest()}"
+
+
+def _recall_parsed_resume(resume_text, mask_pii_enabled, filename, upload_date):
+    """Cached candidate record for this exact resume text, stamped for this upload."""
+    cached = read_llm_cache(_parsed_resume_key(resume_text, mask_pii_enabled))
+    if cached is None:
         return None
+    return _stamp_resume_record(json.loads(cached), filename, upload_date)
+
+
+def _remember_parsed_resume(resume_text, mask_pii_enabled, parsed_data):
+    record = {k: v for k, v in parsed_data.items() if k not in ('filename', 'submission_date')}
+    write_llm_cache(_parsed_resume_key(resume_text, mask_pii_enabled), json.dumps(record, default=str))
+
+
+def _stamp_resume_record(parsed_data, filename, upload_date):
+    parsed_data['filename'] = filename
+    parsed_data['submission_date'] = upload_date if upload_date else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return parsed_data
+
+
+def _finalize_parsed_resume(response, filename, mask_pii_enabled, upload_date,
+                            email_extracted, phone_extracted):
+    """Turn the parser's response text into the candidate record (or None)."""
+    parsed_data = parse_json_response(response)
+
+    if parsed_data is not None:
+
+        if mask_pii_enabled:
+            if email_extracted:
+                parsed_data['email'] = email_extracted
+            if phone_extracted:
+                parsed_data['phone'] = phone_extracted
+        else:
+            if not parsed_data.get('email') or parsed_data.get('email') == 'null':
+                parsed_data['email'] = email_extracted if email_extracted else None
+            if not parsed_data.get('phone') or parsed_data.get('phone') == 'null':
+                parsed_data['phone'] = phone_extracted if phone_extracted else None
+
+        return _stamp_resume_record(parsed_data, filename, upload_date)
+    return None
+
+
+async def parse_resume_with_groq_async(client, fallback_client, resume_text, filename,
+                                       mask_pii_enabled=False, upload_date=None, on_delta=None):
+    """
+    Parse one resume with an AsyncGroq client, with optional PII masking and the
+    fallback key. The completion is streamed; `on_delta` receives the characters
+    received so far.
+    """
+    parsed_data = _recall_parsed_resume(resume_text, mask_pii_enabled, filename, upload_date)
+    if parsed_data is not None:
+        return parsed_data
+
+    request, email_extracted, phone_extracted = _resume_parse_request(resume_text, mask_pii_enabled)
+    cache_key = make_cache_key(request, resume_text, mask_pii_enabled)
+
+    try:
+        # Exact matches only: a near-duplicate resume may be another candidate
+        response = read_llm_cache(cache_key)
+        cache_hit = response is not None
+        if not cache_hit:
+            response = await stream_groq_completion_async(
+                client, fallback_client, on_delta=on_delta, stop_after_json='{', **request
+            )
+        parsed_data = _finalize_parsed_resume(
+            response, filename, mask_pii_enabled, upload_date, email_extracted, phone_extracted
+        )
+        if parsed_data is not None:
+            if not cache_hit:
+                write_llm_cache(cache_key, response)
+            _remember_parsed_resume(resume_text, mask_pii_enabled, parsed_data)
+        return parsed_data
 
     except Exception as e:
         st.error(f"Error parsing {filename}: {str(e)}")
         return None
 
 
-def extract_jd_requirements(client, job_description):
-    """Extract minimum experience and required skills from JD automatically."""
+async def parse_resume_batch_async(client, fallback_client, resumes, mask_pii_enabled=False,
+                                   on_delta=None):
+    """
+    Parse several resumes with a single streamed Groq request.
+
+    `resumes` is a list of dicts with 'text', 'filename' and 'upload_date'.
+    Returns parsed records in input order, None for entries the batched
+    response did not cover (callers retry those on their own). Each parsed
+    entry is cached under its single-resume key, so later runs hit the
+    cache whether or not they batch.
+    """
+    prepared = [_prepare_resume_text(r['text'], mask_pii_enabled) for r in resumes]
+    request = _batch_parse_request([processed for processed, _, _ in prepared])
+
+    try:
+        response = await stream_groq_completion_async(
+            client, fallback_client, on_delta=on_delta, stop_after_json='[', **request
+        )
+    except Exception as e:
+        st.warning(f"Batched parse failed, retrying resumes one by one: {str(e)}")
+        return [None] * len(resumes)
+
+    results = []
+    for resume, (_, email_extracted, phone_extracted), entry in zip(
+        resumes, prepared, _split_batch_response(response, len(resumes))
+    ):
+        parsed_data = None
+        if entry is not None:
+            parsed_data = _finalize_parsed_resume(
+                entry, resume['filename'], mask_pii_enabled, resume.get('upload_date'),
+                email_extracted, phone_extracted,
+            )
+        if parsed_data is not None:
+            single_request, _, _ = _resume_parse_request(resume['text'], mask_pii_enabled)
+            cache_key = make_cache_key(single_request, resume['text'], mask_pii_enabled)
+            write_llm_cache(cache_key, entry)
+            _remember_parsed_resume(resume['text'], mask_pii_enabled, parsed_data)
+        results.append(parsed_data)
+    return results
+
+
+def _uncached_resume_batches(resumes, mask_pii_enabled, batch_size):
+    """
+    Group resumes the caches cannot answer into batches of up to batch_size.
+    Each distinct text appears once; yields lists of input indices.
+    """
+    misses, seen = [], set()
+    for i, resume in enumerate(resumes):
+        text = resume['text']
+        if text in seen:
+            continue
+        seen.add(text)
+        if read_llm_cache(_parsed_resume_key(text, mask_pii_enabled)) is not None:
+            continue
+        request, _, _ = _resume_parse_request(text, mask_pii_enabled)
+        cache_key = make_cache_key(request, text, mask_pii_enabled)
+        if read_llm_cache(cache_key) is None:
+            misses.append(i)
+    for start in range(0, len(misses), batch_size):
+        yield misses[start:start + batch_size]
+
+
+def parse_resumes_concurrently(client, resumes, mask_pii_enabled=False,
+                               max_concurrency=GROQ_MAX_CONCURRENCY, on_parsed=None,
+                               on_progress=None, batch_size=RESUME_PARSE_BATCH_SIZE):
+    """
+    Parse many resumes with overlapping Groq requests on one event loop.
+
+    `resumes` is a list of dicts with 'text', 'filename' and 'upload_date'.
+    Returns parsed records (or None) in input order. `on_parsed` is called
+    with the number of completed resumes and the resume that just finished;
+    `on_progress` with a resume and the characters streamed for it so far.
+    Uncached resumes are sent `batch_size` to a request; entries a batch
+    misses are retried singly. Resumes with identical text are parsed one
+    after another so repeats are served from the LLM cache instead of a
+    second request.
+    """
     fallback_client = st.session_state.get('fallback_client')
-#Few shot prompting is used 
-    prompt = f"""
-You are a deterministic job description parser.
 
-Extract structured hiring requirements.
+    async def _parse_all():
+        async_client = init_async_groq_client(client)
+        async_fallback = init_async_groq_client(fallback_client)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        same_text_locks = defaultdict(asyncio.Lock)
+        results = [None] * len(resumes)
+        completed = 0
+
+        def _record(i, parsed):
+            nonlocal completed
+            results[i] = parsed
+            completed += 1
+            if on_parsed:
+                on_parsed(completed, resumes[i])
+
+        async def _parse_single(resume):
+            return await parse_resume_with_groq_async(
+                async_client, async_fallback, resume['text'], resume['filename'],
+                mask_pii_enabled, resume.get('upload_date'),
+                on_delta=(lambda received: on_progress(resume, received)) if on_progress else None,
+            )
+
+        async def _parse_one(i):
+            async with same_text_locks[resumes[i]['text']], semaphore:
+                _record(i, await _parse_single(resumes[i]))
+
+        async def _parse_batch(indices):
+            batch = [resumes[i] for i in indices]
+            locks = [same_text_locks[r['text']] for r in batch]
+            for lock in locks:
+                await lock.acquire()
+            try:
+                async with semaphore:
+                    parsed_batch = await parse_resume_batch_async(
+                        async_client, async_fallback, batch, mask_pii_enabled,
+                        on_delta=(lambda received: on_progress(batch[0], received)) if on_progress else None,
+                    )
+                    for i, resume, parsed in zip(indices, batch, parsed_batch):
+                        _record(i, parsed if parsed is not None else await _parse_single(resume))
+            finally:
+                for lock in locks:
+                    lock.release()
+
+        batches = []
+        if batch_size > 1:
+            batches = [b for b in _uncached_resume_batches(resumes, mask_pii_enabled, batch_size) if len(b) > 1]
+        batched = {i for b in batches for i in b}
+        # Batches go first so they hold their texts' locks before any duplicate asks
+        tasks = [_parse_batch(b) for b in batches]
+        tasks += [_parse_one(i) for i in range(len(resumes)) if i not in batched]
+
+        try:
+            await asyncio.gather(*tasks)
+            return results
+        finally:
+            await async_client.close()
+            if async_fallback is not None:
+                await async_fallback.close()
+
+    if not resumes:
+        return []
+    return asyncio.run(_parse_all())
+
+
+#Few shot prompting is used; kept static (system message) so its prefill is cacheable
+JD_REQUIREMENTS_SYSTEM_PROMPT = """
+You are an expert at analyzing job descriptions and a deterministic job description parser.
+
+Extract structured hiring requirements from the job description in the user message.
 
 RULES:
 - Extract only technical skills.
@@ -164,13 +559,13 @@ Job Description:
 "Junior Data Analyst required. Skills: SQL, Excel, Python."
 
 Output:
-{{
+{
   "minimum_experience_years": 0,
   "required_technical_skills": ["SQL","Excel","Python"],
   "preferred_skills": [],
   "job_title": "Data Analyst",
   "seniority_level": "Entry"
-}}
+}
 
 EXAMPLE 2
 
@@ -180,48 +575,57 @@ Must have AWS, Kubernetes, Terraform.
 Preferred: Docker, Jenkins."
 
 Output:
-{{
+{
   "minimum_experience_years": 7,
   "required_technical_skills": ["AWS","Kubernetes","Terraform"],
   "preferred_skills": ["Docker","Jenkins"],
   "job_title": "DevOps Engineer",
   "seniority_level": "Senior"
-}}
-
-NOW PROCESS:
-
-JOB DESCRIPTION:
-['job_description']
+}
 
-Return ONLY:
-{{
+Return ONLY valid JSON of this shape:
+{
   "minimum_experience_years": 0,
   "required_technical_skills": [],
   "preferred_skills": [],
   "job_title": "",
   "seniority_level": ""
-}}
+}
 """
 
-    try:
-        chat_completion = create_groq_completion(
-            client,
-            fallback_client,
-            messages=[
-                {"role": "system", "content": "You are an expert at analyzing job descriptions. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.1,
-            max_tokens=800
-        )
 
-        response = chat_completion.choices[0].message.content.strip()
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
+def extract_jd_requirements(client, job_description):
+    """Extract minimum experience and required skills from JD automatically."""
+    fallback_client = st.session_state.get('fallback_client')
+
+    request = dict(
+        messages=[
+            {"role": "system", "content": JD_REQUIREMENTS_SYSTEM_PROMPT},
+            {"role": "user", "content": f"JOB DESCRIPTION:\n{job_description}"}
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.1,
+        max_tokens=800
+    )
+    cache_key = make_cache_key(request, job_description)
 
-        if json_start != -1 and json_end > json_start:
-            return json.loads(response[json_start:json_end])
+    try:
+        # Exact match first, then a near-duplicate JD; a near-duplicate answer is never
+        # written back under this JD's exact key
+        response = read_llm_cache(cache_key)
+        cache_hit = response is not None
+        if not cache_hit:
+            response = semantic_lookup("jd", job_description)
+            cache_hit = response is not None
+        if not cache_hit:
+            response = stream_groq_completion(client, fallback_client, stop_after_json='{', **request)
+
+        jd_requirements = parse_json_response(response)
+        if jd_requirements is not None:
+            if not cache_hit:
+                write_llm_cache(cache_key, response)
+                semantic_store("jd", job_description, response)
+            return jd_requirements
         return None
 
     except Exception as e:
@@ -3,22 +3,190 @@ Candidate scoring and matching utilities - UPDATED WITH FLEXIBLE SCREENING
 """
 
 import streamlit as st
+import re
 import pandas as pd
-import json
+import asyncio
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from utils.groq_client import create_groq_completion
+from utils.groq_client import (
+    stream_groq_completion,
+    stream_groq_completion_async,
+    init_async_groq_client,
+    parse_json_response,
+)
+from config.settings import GROQ_MAX_CONCURRENCY
 
+# Aho-Corasick finds every required skill in one pass per tech stack; optional
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-def calculate_semantic_score(resume_text, jd_text):
-    """Calculate objective similarity score using TF-IDF."""
-    try:
-        vectorizer = TfidfVectorizer(max_features=500)
-        vectors = vectorizer.fit_transform([resume_text, jd_text])
-        score = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
-        return round(score * 100, 2)
-    except:
-        return 0
+
+# Vocabulary of the corpus-wide fit; 500 terms over a whole batch of resumes keeps
+# mostly generic words and leaves the skill terms that separate candidates out
+TFIDF_MAX_FEATURES = 5000
+
+
+def _resume_tfidf():
+    """
+    TF-IDF vectorizer, document-term matrix, name -> row index and a JD
+    vector memo, fitted on every parsed resume. Kept in session state and
+    refit only when the set of resume texts changes, so matching reruns
+    (and every shard of one run) reuse the fit and the JD vector.
+    """
+    resume_texts = st.session_state.get('resume_texts', {})
+    key = hash(tuple(sorted(resume_texts.items())))
+    cached = st.session_state.get('_resume_tfidf')
+    if cached is None or cached[0] != key:
+        vectorizer = TfidfVectorizer(max_features=TFIDF_MAX_FEATURES)
+        try:
+            matrix = vectorizer.fit_transform(list(resume_texts.values()))
+        except ValueError:  # no resumes, or no usable terms
+            matrix = None
+        cached = (key, vectorizer, matrix, {name: i for i, name in enumerate(resume_texts)}, {})
+        st.session_state['_resume_tfidf'] = cached
+    return cached[1:]
+
+
+def semantic_scores_for(names, jd_text):
+    """TF-IDF similarity to the JD for each named candidate; None where no resume text is known."""
+    vectorizer, matrix, row_index, jd_vectors = _resume_tfidf()
+    rows = [row_index.get(name) for name in names]
+    known = [row for row in rows if row is not None]
+    if matrix is None or not known:
+        return [None] * len(names)
+
+    jd_vector = jd_vectors.get(jd_text)
+    if jd_vector is None:
+        jd_vectors.clear()  # only the JD being matched is worth keeping
+        jd_vector = jd_vectors[jd_text] = vectorizer.transform([jd_text])
+
+    similarities = cosine_similarity(matrix[known], jd_vector).ravel()
+    scores = iter(round(score * 100, 2) for score in similarities)
+    return [None if row is None else next(scores) for row in rows]
+
+
+# Looser spellings that also count as having a required skill
+SKILL_ALIASES = {
+    'scikit-learn': ('sklearn', 'scikit'),
+    'tensorflow': ('tensor',),
+    'pytorch': ('torch',),
+    'numpy': ('np',),
+    'pandas': ('pd',),
+}
+
+
+def _experience_values(df):
+    """experience_years as floats, plus a mask of rows where float() would have succeeded."""
+    if 'experience_years' not in df.columns:
+        return pd.Series(0.0, index=df.index), pd.Series(True, index=df.index)
+    raw = df['experience_years']
+    experience = pd.to_numeric(raw, errors='coerce')
+    if pd.api.types.is_numeric_dtype(raw):
+        return experience.astype(float, copy=False), pd.Series(True, index=df.index)
+    # NaN floats convert fine; None and unparseable strings do not
+    converted = experience.notna() | raw.map(lambda v: isinstance(v, float))
+    return experience, converted
+
+
+def tech_stack_text(df):
+    """tech_stack as text; Arrow string columns stay Arrow-backed with missing values blanked."""
+    tech_stack = df['tech_stack']
+    if isinstance(tech_stack.dtype, pd.StringDtype):
+        return tech_stack.fillna('')
+    return tech_stack.astype(str)
+
+
+def _skill_pattern(skill_lower):
+    """
+    Regex for a skill or any alias as a whole term, so 'np' does not match
+    inside 'snpx' nor 'java' inside 'javascript'. Trailing version digits
+    ('python3') still count. Plain groups rather than lookarounds keep the
+    pattern valid for Arrow's RE2 engine.
+    """
+    return '|'.join(
+        _skill_pattern_term(term) for term in (skill_lower, *SKILL_ALIASES.get(skill_lower, ()))
+    )
+
+
+def _skill_pattern_term(term):
+    """One term, fenced at whichever ends are alphanumeric."""
+    return (
+        ('(?:^|[^a-z0-9])' if term[:1].isalnum() else '')
+        + re.escape(term)
+        + ('(?:$|[^a-z])' if term[-1:].isalnum() else '')
+    )
+
+
+_TERM_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789')
+_WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz')
+
+
+def _skill_terms(required_skills):
+    """Every non-empty skill and alias term -> indices of the required skills it satisfies."""
+    terms = {}
+    for i, skill in enumerate(required_skills):
+        skill_lower = skill.lower()
+        for term in (skill_lower, *SKILL_ALIASES.get(skill_lower, ())):
+            if term:
+                terms.setdefault(term, set()).add(i)
+    return terms
+
+
+def _skill_automaton(terms):
+    """Automaton over the skill terms -> (term, indices of the skills it satisfies)."""
+    automaton = ahocorasick.Automaton()
+    for term, skills in terms.items():
+        automaton.add_word(term, (term, skills))
+    automaton.make_automaton()
+    return automaton
+
+
+def _always_matched(required_skills):
+    # An empty skill matches every stack, as the empty regex does
+    return sum(1 for skill in required_skills if not skill)
+
+
+def _automaton_skill_counts(tech_stack, required_skills):
+    """Same whole-term rule as _skill_pattern, one automaton pass per tech stack."""
+    always = _always_matched(required_skills)
+    if always == len(required_skills):
+        return pd.Series(always, index=tech_stack.index)
+    automaton = _skill_automaton(_skill_terms(required_skills))
+
+    def _count(text):
+        found = set()
+        for end, (term, skills) in automaton.iter(text):
+            start = end - len(term) + 1
+            if term[0].isalnum() and start > 0 and text[start - 1] in _TERM_CHARS:
+                continue
+            if term[-1].isalnum() and end + 1 < len(text) and text[end + 1] in _WORD_CHARS:
+                continue
+            found |= skills
+        return len(found) + always
+
+    return tech_stack.map(_count).astype(int)
+
+
+def _matched_skill_counts(df, required_skills):
+    """
+    Number of required skills (or their aliases) found in each candidate's
+    tech stack: one Aho-Corasick pass per stack, or a _skill_pattern search
+    per skill without pyahocorasick.
+    """
+    if 'tech_stack' in df.columns:
+        tech_stack = tech_stack_text(df).str.lower()
+    else:
+        tech_stack = pd.Series('', index=df.index)
+
+    if ahocorasick is not None:
+        return _automaton_skill_counts(tech_stack, required_skills)
+
+    matched = pd.Series(0, index=df.index)
+    for skill in required_skills:
+        matched += tech_stack.str.contains(_skill_pattern(skill.lower()))
+    return matched
 
 
 def auto_pre_screen_candidates(df, jd_requirements):
@@ -29,75 +197,37 @@ def auto_pre_screen_candidates(df, jd_requirements):
     if df is None or df.empty or jd_requirements is None:
         return df, []
 
-    filtered_candidates = []
     min_exp = jd_requirements.get('minimum_experience_years', 0)
     required_skills = jd_requirements.get('required_technical_skills', [])
 
-    experience_pass_count = 0
-    skills_pass_count = 0
-
-    for idx, row in df.iterrows():
-        candidate_score = 0
-        reasons = []
-
-        # Experience check
-        try:
-            candidate_exp = float(row.get('experience_years', 0))
-            if min_exp > 0:
-                exp_threshold = min_exp * 0.8
-                if candidate_exp >= min_exp:
-                    candidate_score += 50
-                    reasons.append(f"Meets experience requirement ({candidate_exp} >= {min_exp} years)")
-                    experience_pass_count += 1
-                elif candidate_exp >= exp_threshold:
-                    candidate_score += 35
-                    reasons.append(f"Close to experience requirement ({candidate_exp} years, preferred {min_exp}+)")
-                    experience_pass_count += 1
-                else:
-                    reasons.append(f"Below experience threshold ({candidate_exp} < {exp_threshold} years)")
-            else:
-                candidate_score += 25
-        except:
-            pass
-
-        # Skills check
-        if required_skills:
-            tech_stack = str(row.get('tech_stack', '')).lower()
-            matched_skills = []
-
-            for skill in required_skills:
-                skill_lower = skill.lower()
-                if (skill_lower in tech_stack or
-                        (skill_lower == 'scikit-learn' and ('sklearn' in tech_stack or 'scikit' in tech_stack)) or
-                        (skill_lower == 'tensorflow' and 'tensor' in tech_stack) or
-                        (skill_lower == 'pytorch' and 'torch' in tech_stack) or
-                        (skill_lower == 'numpy' and 'np' in tech_stack) or
-                        (skill_lower == 'pandas' and 'pd' in tech_stack)):
-                    matched_skills.append(skill)
-
-            if len(required_skills) > 0:
-                skill_match_ratio = len(matched_skills) / len(required_skills)
-                if skill_match_ratio >= 0.6:
-                    candidate_score += 50
-                    reasons.append(f"Strong skill match ({len(matched_skills)}/{len(required_skills)} required skills)")
-                    skills_pass_count += 1
-                elif skill_match_ratio >= 0.3:
-                    candidate_score += 35
-                    reasons.append(f"Partial skill match ({len(matched_skills)}/{len(required_skills)} required skills)")
-                    skills_pass_count += 1
-                elif len(matched_skills) > 0:
-                    candidate_score += 20
-                    reasons.append(f"Some relevant skills ({len(matched_skills)} matched)")
-                    skills_pass_count += 1
-                else:
-                    reasons.append(f"Limited skill match (0/{len(required_skills)} required skills)")
-        else:
-            candidate_score += 25
-
-        if candidate_score >= 40:
-            filtered_candidates.append(row)
-
-    filtered_df = pd.DataFrame(filtered_candidates) if filtered_candidates else pd.DataFrame()
+    # Experience check: 50 when met, 35 within 80% of the minimum
+    experience, converted = _experience_values(df)
+    if min_exp > 0:
+        exp_threshold = min_exp * 0.8
+        meets = converted & (experience >= min_exp)
+        close = converted & ~meets & (experience >= exp_threshold)
+        candidate_score = meets * 50 + close * 35
+        experience_pass_count = int((meets | close).sum())
+    else:
+        candidate_score = converted * 25
+        experience_pass_count = 0
+
+    # Skills check: 50 for 60%+ of required skills, 35 for 30%+, 20 for any
+    if required_skills:
+        matched = _matched_skill_counts(df, required_skills)
+        ratio = matched / len(required_skills)
+        skill_score = pd.Series(0, index=df.index)
+        skill_score[matched > 0] = 20
+        skill_score[ratio >= 0.3] = 35
+        skill_score[ratio >= 0.6] = 50
+        candidate_score = candidate_score + skill_score
+        skills_pass_count = int((matched > 0).sum())
+    else:
+        candidate_score = candidate_score + 25
+        skills_pass_count = 0
+
+    passed = candidate_score >= 40
+    filtered_df = df[passed] if passed.any() else pd.DataFrame()
 
     screening_summary = []
     if min_exp > 0:
@@ -115,20 +245,15 @@ def auto_pre_screen_candidates(df, jd_requirements):
     return filtered_df, screening_summary
 
 
-def match_candidates_with_jd(client, candidates_df, job_description, top_n=5):
-    """
-    Optimized hybrid matching: 70% LLM + 30% TF-IDF.
-    Uses fallback Groq client when available.
-    """
-    if candidates_df.empty:
-        return []
+# Pools larger than this are ranked in parallel shards
+MATCH_SHARD_SIZE = 25
 
-    fallback_client = st.session_state.get('fallback_client')
-    actual_top_n = min(top_n, len(candidates_df))
 
-    candidates_summary = ""
-    for idx, row in candidates_df.iterrows():
-        candidates_summary += f"""
+def _match_request(candidates_df, job_description, actual_top_n):
+    """Build the ranking completion kwargs for a pool of candidates."""
+    # Plain dict records: cheaper per row than iterrows' Series, and .get still covers missing columns
+    candidates_summary = "".join(
+        f"""
 Candidate {idx + 1}:
 - Name: {row.get('name', 'N/A')}
 - Email: {row.get('email', 'N/A')}
@@ -137,6 +262,8 @@ Candidate {idx + 1}:
 - Role: {row.get('current_role', 'N/A')}
 - Projects: {row.get('key_projects', 'N/A')}
 """
+        for idx, row in zip(candidates_df.index, candidates_df.to_dict('records'))
+    )
 
     prompt = f"""You are an expert HR recruiter. Rank the top {actual_top_n} candidates for this job.
 
@@ -168,55 +295,138 @@ Return JSON array with EXACTLY {actual_top_n} candidates:
 
 Return ONLY JSON array with EXACTLY {actual_top_n} candidates."""
 
+    return dict(
+        messages=[
+            {"role": "system", "content": f"Expert technical recruiter AI. You MUST return exactly {actual_top_n} candidates."},
+            {"role": "user", "content": prompt}
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.3,
+        max_tokens=3000
+    )
+
+
+def _score_match_results(response, job_description, actual_top_n):
+    """Parse ranked candidates and blend in the TF-IDF semantic score."""
+    results = parse_json_response(response, '[')
+    if results is None:
+        return []
+
+    results = results[:actual_top_n]
+
+    semantic_scores = semantic_scores_for([r.get('name', '') for r in results], job_description)
+
+    for result, semantic_score in zip(results, semantic_scores):
+        if semantic_score is not None:
+            result['semantic_score'] = semantic_score
+            llm_score = result.get('match_percentage', 0)
+            result['final_score'] = round(llm_score * 0.7 + semantic_score * 0.3, 2)
+        else:
+            result['semantic_score'] = 0
+            result['final_score'] = result.get('match_percentage', 0)
+
+    return results
+
+
+def _rank_results(results, actual_top_n):
+    """Sort by final score and renumber ranks from 1."""
+    results.sort(key=lambda x: x['final_score'], reverse=True)
+    for idx, result in enumerate(results, 1):
+        result['rank'] = idx
+    return results[:actual_top_n]
+
+
+def match_candidates_with_jd(client, candidates_df, job_description, top_n=5, on_progress=None):
+    """
+    Optimized hybrid matching: 70% LLM + 30% TF-IDF.
+    Uses fallback Groq client when available. The ranking is streamed;
+    `on_progress` receives the number of characters received so far.
+    """
+    if candidates_df.empty:
+        return []
+
+    fallback_client = st.session_state.get('fallback_client')
+    actual_top_n = min(top_n, len(candidates_df))
+
     try:
-        chat_completion = create_groq_completion(
+        response = stream_groq_completion(
             client,
             fallback_client,
-            messages=[
-                {"role": "system", "content": f"Expert technical recruiter AI. You MUST return exactly {actual_top_n} candidates."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=3000
+            on_delta=on_progress,
+            stop_after_json='[',
+            **_match_request(candidates_df, job_description, actual_top_n)
         )
-
-        response = chat_completion.choices[0].message.content.strip()
-        json_start = response.find('[')
-        json_end = response.rfind(']') + 1
-
-        if json_start != -1:
-            results = json.loads(response[json_start:json_end])
-            results = results[:actual_top_n]
-
-            for result in results:
-                candidate_name = result.get('name', '')
-                resume_text = st.session_state.resume_texts.get(candidate_name, '')
-                if resume_text:
-                    semantic_score = calculate_semantic_score(resume_text, job_description)
-                    result['semantic_score'] = semantic_score
-                    llm_score = result.get('match_percentage', 0)
-                    result['final_score'] = round(llm_score * 0.7 + semantic_score * 0.3, 2)
-                else:
-                    result['semantic_score'] = 0
-                    result['final_score'] = result.get('match_percentage', 0)
-
-            results.sort(key=lambda x: x['final_score'], reverse=True)
-            for idx, result in enumerate(results, 1):
-                result['rank'] = idx
-
-            return results[:actual_top_n]
-        return []
+        results = _score_match_results(response, job_description, actual_top_n)
+        return _rank_results(results, actual_top_n)
 
     except Exception as e:
         st.error(f"Matching error: {str(e)}")
         return []
 
 
-def generate_interview_questions(client, candidate_data, job_description):
-    """Generate personalized interview questions. Uses fallback Groq client when available."""
+def match_candidates_sharded(client, candidates_df, job_description, top_n=5,
+                             shard_size=MATCH_SHARD_SIZE, max_concurrency=GROQ_MAX_CONCURRENCY,
+                             on_progress=None):
+    """
+    Rank large pools by matching shards of candidates concurrently.
+
+    Each shard returns its own top N; the shortlists are merged on final
+    score. At most max_concurrency shard requests are in flight at once.
+    `on_progress` receives the characters streamed across all shards.
+    Pools that fit in one shard use match_candidates_with_jd.
+    """
+    if len(candidates_df) <= shard_size:
+        return match_candidates_with_jd(client, candidates_df, job_description, top_n, on_progress)
+
     fallback_client = st.session_state.get('fallback_client')
+    actual_top_n = min(top_n, len(candidates_df))
+    shards = [candidates_df.iloc[i:i + shard_size] for i in range(0, len(candidates_df), shard_size)]
+
+    async def _match_all():
+        async_client = init_async_groq_client(client)
+        async_fallback = init_async_groq_client(fallback_client)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        shard_received = [0] * len(shards)
+
+        async def _match_shard(i, shard):
+            shard_top_n = min(actual_top_n, len(shard))
+
+            def _on_delta(received):
+                shard_received[i] = received
+                if on_progress:
+                    on_progress(sum(shard_received))
+
+            async with semaphore:
+                response = await stream_groq_completion_async(
+                    async_client,
+                    async_fallback,
+                    on_delta=_on_delta,
+                    stop_after_json='[',
+                    **_match_request(shard, job_description, shard_top_n)
+                )
+            return _score_match_results(response, job_description, shard_top_n)
 
+        try:
+            return await asyncio.gather(
+                *[_match_shard(i, shard) for i, shard in enumerate(shards)], return_exceptions=True
+            )
+        finally:
+            await async_client.close()
+            if async_fallback is not None:
+                await async_fallback.close()
+
+    results = []
+    for shard_results in asyncio.run(_match_all()):
+        if isinstance(shard_results, Exception):
+            st.error(f"Matching error: {str(shard_results)}")
+            continue
+        results.extend(shard_results)
+
+    return _rank_results(results, actual_top_n)
+
+
+def _interview_request(candidate_data, job_description):
+    """Build the interview-question completion kwargs for one candidate."""
     prompt = f"""Generate 8 targeted interview questions for this candidate.
 
 CANDIDATE:
@@ -236,30 +446,84 @@ Generate:
 Return JSON:
 [{{"category": "Technical", "question": "...", "why_asking": "..."}}]"""
 
+    return dict(
+        messages=[
+            {"role": "system", "content": "Interview question generator."},
+            {"role": "user", "content": prompt}
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.4,
+        max_tokens=2000
+    )
+
+
+def generate_interview_questions(client, candidate_data, job_description, on_progress=None):
+    """
+    Generate personalized interview questions. Uses fallback Groq client when available.
+    The reply is streamed; `on_progress` receives the characters received so far.
+    """
+    fallback_client = st.session_state.get('fallback_client')
+
     try:
-        response = create_groq_completion(
+        text = stream_groq_completion(
             client,
             fallback_client,
-            messages=[
-                {"role": "system", "content": "Interview question generator."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.4,
-            max_tokens=2000
+            on_delta=on_progress,
+            stop_after_json='[',
+            **_interview_request(candidate_data, job_description)
         )
 
-        text = response.choices[0].message.content.strip()
-        json_start = text.find('[')
-        json_end = text.rfind(']') + 1
-
-        if json_start != -1:
-            return json.loads(text[json_start:json_end])
-        return []
+        return parse_json_response(text, '[') or []
     except:
         return []
 
 
+def generate_interview_questions_concurrently(client, candidates, job_description,
+                                              max_concurrency=GROQ_MAX_CONCURRENCY, on_done=None):
+    """
+    Generate interview questions for several candidates with overlapping
+    Groq requests. Returns one question list per candidate, in input order
+    ([] where generation failed). `on_done` is called with the number of
+    finished candidates and the candidate that just finished.
+    """
+    fallback_client = st.session_state.get('fallback_client')
+
+    async def _generate_all():
+        async_client = init_async_groq_client(client)
+        async_fallback = init_async_groq_client(fallback_client)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        completed = 0
+
+        async def _generate_one(candidate_data):
+            nonlocal completed
+            try:
+                async with semaphore:
+                    text = await stream_groq_completion_async(
+                        async_client,
+                        async_fallback,
+                        stop_after_json='[',
+                        **_interview_request(candidate_data, job_description)
+                    )
+                questions = parse_json_response(text, '[') or []
+            except Exception:
+                questions = []
+            completed += 1
+            if on_done:
+                on_done(completed, candidate_data)
+            return questions
+
+        try:
+            return await asyncio.gather(*[_generate_one(c) for c in candidates])
+        finally:
+            await async_client.close()
+            if async_fallback is not None:
+                await async_fallback.close()
+
+    if not candidates:
+        return []
+    return asyncio.run(_generate_all())
+
+
 def format_strengths_weaknesses(text):
     """Convert comma-separated text to list items."""
     if not text or text == "None" or text == "N/A":
@@ -271,6 +535,6 @@ def format_strengths_weaknesses(text):
 def format_dataframe_for_display(df, columns_to_display):
     """Format dataframe with proper naming conventions."""
     from config.settings import COLUMN_DISPLAY_NAMES
-    display_df = df[columns_to_display].copy()
-    display_df = display_df.rename(columns=COLUMN_DISPLAY_NAMES)
+    # rename already returns a new frame, so the column selection needs no copy
+    display_df = df[columns_to_display].rename(columns=COLUMN_DISPLAY_NAMES)
     return display_df
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Near-duplicate (semantic) cache for LLM responses
+Reuses a stored response when a JD is almost identical to one already
+processed, e.g. a re-exported or lightly edited document. Resumes are not
+reused this way: a near-identical resume may belong to another candidate.
+"""
+
+import streamlit as st
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Stateless character n-gram embedding: no model download, no fitting
+_vectorizer = HashingVectorizer(
+    analyzer='char_wb',
+    ngram_range=(3, 5),
+    n_features=2 ** 18,
+    alternate_sign=False,
+    norm='l2',
+)
+
+# Entries kept per kind in each session's index; the least recently used goes first
+SEMANTIC_CACHE_MAX_ENTRIES = 256
+
+
+def semantic_cache_threshold():
+    """Similarity threshold from the sidebar, or None when disabled."""
+    return st.session_state.get('semantic_cache_threshold')
+
+
+def _embed(text: str):
+    return _vectorizer.transform([text])
+
+
+def _index(kind: str):
+    """
+    This session's index for `kind`: row vectors, responses and last-use
+    ticks in parallel lists. Indexes live in session state so one user's
+    responses are never served to another.
+    """
+    indexes = st.session_state.setdefault('_semantic_index', {})
+    return indexes.setdefault(kind, {'vectors': [], 'responses': [], 'used': [], 'matrix': None, 'tick': 0})
+
+
+def semantic_lookup(kind: str, text: str):
+    """Return the response of the most similar cached document above threshold."""
+    threshold = semantic_cache_threshold()
+    if threshold is None:
+        return None
+    entry = _index(kind)
+    if not entry['vectors']:
+        return None
+
+    # Rows are stacked only when a lookup needs them, not on every store
+    if entry['matrix'] is None:
+        entry['matrix'] = sp.vstack(entry['vectors'], format='csr')
+    similarities = (entry['matrix'] @ _embed(text).T).toarray().ravel()
+    best = int(similarities.argmax())
+    if similarities[best] < threshold:
+        return None
+    entry['tick'] += 1
+    entry['used'][best] = entry['tick']
+    return entry['responses'][best]
+
+
+def semantic_store(kind: str, text: str, response: str) -> None:
+    if semantic_cache_threshold() is None:
+        return
+    entry = _index(kind)
+    entry['tick'] += 1
+    entry['vectors'].append(_embed(text))
+    entry['responses'].append(response)
+    entry['used'].append(entry['tick'])
+    if len(entry['vectors']) > SEMANTIC_CACHE_MAX_ENTRIES:
+        oldest = entry['used'].index(min(entry['used']))
+        for column in ('vectors', 'responses', 'used'):
+            del entry[column][oldest]
+    entry['matrix'] = None
+
+
+def clear_semantic_cache() -> None:
+    st.session_state.pop('_semantic_index', None)
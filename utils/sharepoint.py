@@ -5,30 +5,30 @@ Supports separate INPUT and OUTPUT folders via .env config.
 """
 
 import streamlit as st
-import io
+import base64
+import time
+import random
+import gzip
 import os
-import requests
+import importlib.util
+import httpx
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from utils.file_handlers import dataframe_to_csv_bytes
 
 # Load environment variables
 load_dotenv()
 
 # ── Dependency Check ────────────────────────────────────────────────────────
 
-SHAREPOINT_AVAILABLE = False
-SHAREPOINT_ERROR = None
-
-try:
-    import msal
-    SHAREPOINT_AVAILABLE = True
-except ImportError as e:
-    SHAREPOINT_AVAILABLE = False
-    SHAREPOINT_ERROR = str(e)
-except Exception as e:
-    SHAREPOINT_AVAILABLE = False
-    SHAREPOINT_ERROR = f"Unexpected error: {str(e)}"
+# msal (and the requests/cryptography stack under it) is imported on first sign-in,
+# so app start-up does not pay for it when SharePoint is never used
+SHAREPOINT_AVAILABLE = importlib.util.find_spec("msal") is not None
+SHAREPOINT_ERROR = None if SHAREPOINT_AVAILABLE else "No module named 'msal'"
 
 
 # ── CONFIG LOADER (FROM ENV) ───────────────────────────────────────────────
@@ -43,49 +43,180 @@ def get_sharepoint_config() -> dict:
         "drive_id": os.getenv("DRIVE_ID"),
         "input_folder_path": os.getenv("INPUT_FOLDER_PATH"),
         "output_folder_path": os.getenv("OUTPUT_FOLDER_PATH"),
+        "compress_csv": os.getenv("COMPRESS_CSV_UPLOADS", "").lower() in ("1", "true", "yes"),
     }
 
 
+# Microsoft Graph accepts at most 20 requests per JSON batch; the base64 bodies in one
+# batch are also capped so a single POST stays a few MB
+GRAPH_BATCH_LIMIT = 20
+GRAPH_BATCH_MAX_BYTES = 4 * 1024 * 1024
+
+# Concurrent SharePoint downloads (and pooled keep-alive connections)
+SP_MAX_CONNECTIONS = int(os.getenv("SP_MAX_CONN", "8"))
+
+# Folder listings return only the fields the app reads, in as few pages as Graph allows
+LIST_SELECT = "id,name,file,size,createdDateTime,@microsoft.graph.downloadUrl"
+# Name and file facet (which carries file.hashes) are all the upload dedupe needs
+HASH_LIST_SELECT = "name,file"
+LIST_PAGE_SIZE = 999
+
+# Only resumes the extractor can read are downloaded
+RESUME_EXTENSIONS = (".pdf", ".docx")
+
+# Simple PUT uploads are capped at 4 MB; larger files go through an upload session in
+# slices that must be multiples of 320 KiB
+SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 32 * 320 * 1024
+
+# OneDrive / SharePoint quickXorHash: a 160-bit XOR of the bytes, each shifted 11 bits further
+QUICK_XOR_WIDTH = 160
+QUICK_XOR_SHIFT = 11
+
+# Throttled / transient Graph responses are retried with backoff
+SP_MAX_QUERY_RETRIES = int(os.getenv("SP_MAX_QUERY_RETRIES", "5"))
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _retry_delay(response, attempt: int) -> float:
+    """Seconds to wait before retrying: Retry-After if given, else exponential backoff with jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return min(30.0, 2 ** attempt) + random.uniform(0, 1)
+
+
+def quick_xor_hash(content: bytes) -> str:
+    """
+    Graph's quickXorHash of content (base64), as reported in driveItem
+    file.hashes. Byte i lands at bit (11 * i) % 160, which repeats every 160
+    bytes, so the bytes are XOR-folded into 160 columns by numpy first.
+    """
+    data = np.frombuffer(content, dtype=np.uint8)
+    padded = np.zeros(-(-len(data) // QUICK_XOR_WIDTH) * QUICK_XOR_WIDTH, dtype=np.uint8)
+    padded[:len(data)] = data
+    columns = np.bitwise_xor.reduce(padded.reshape(-1, QUICK_XOR_WIDTH), axis=0) if len(data) else padded
+
+    mask = (1 << QUICK_XOR_WIDTH) - 1
+    value = 0
+    for column, byte in enumerate(columns.tolist()):
+        shift = column * QUICK_XOR_SHIFT % QUICK_XOR_WIDTH
+        value ^= ((byte << shift) | (byte >> (QUICK_XOR_WIDTH - shift))) & mask
+
+    digest = bytearray(value.to_bytes(QUICK_XOR_WIDTH // 8, "little"))
+    for i, b in enumerate(len(content).to_bytes(8, "little")):
+        digest[QUICK_XOR_WIDTH // 8 - 8 + i] ^= b
+    return base64.b64encode(bytes(digest)).decode("ascii")
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_http_client() -> httpx.Client:
+    """
+    One pooled HTTP/2 client for every uploader in the process. Helpers build
+    a fresh uploader per action, so a per-uploader client would drop its
+    keep-alive connections (and TLS sessions) after every click.
+    """
+    return httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=SP_MAX_CONNECTIONS,
+            max_connections=max(20, SP_MAX_CONNECTIONS),
+        ),
+        timeout=30.0,
+    )
+
+
+GRAPH_SCOPES = ["https://graph.microsoft.com/.default"]
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+
+# The Authorization header is rebuilt this many seconds before its token expires
+TOKEN_REFRESH_MARGIN = 300
+
+
+@st.cache_resource(show_spinner=False)
+def _msal_app(tenant_id: str, client_id: str, client_secret: str):
+    """
+    One MSAL confidential client per app registration. Its in-memory token
+    cache outlives individual uploaders, and acquire_token_for_client serves
+    from that cache until the token nears expiry (msal >= 1.23), so repeat
+    actions skip the round-trip to login.microsoftonline.com.
+    """
+    import msal
+    return msal.ConfidentialClientApplication(
+        client_id,
+        authority=f"https://login.microsoftonline.com/{tenant_id}",
+        client_credential=client_secret,
+    )
+
+
 # ── SharePoint Uploader Class ──────────────────────────────────────────────
 
 class SharePointUploader:
-    """Handles Microsoft Graph API interactions for SharePoint."""
+    """Handles Microsoft Graph API interactions for one SharePoint drive."""
 
-    def __init__(self, tenant_id: str, client_id: str, client_secret: str):
+    def __init__(self, tenant_id: str, client_id: str, client_secret: str, site_id: str, drive_id: str):
         self.tenant_id = tenant_id
         self.client_id = client_id
         self.client_secret = client_secret
+        # Drive root relative to GRAPH_URL, the form $batch requests use
+        self.drive_root = f"/sites/{site_id}/drives/{drive_id}/root:"
         self.access_token = self._get_access_token()
+        self._auth_headers = {"Authorization": f"Bearer {self.access_token}"}
+        # Process-wide HTTP/2 connection pool, reused across uploaders and reruns
+        self.http = _shared_http_client()
 
     def _get_access_token(self) -> str:
-        authority = f"https://login.microsoftonline.com/{self.tenant_id}"
-
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=authority,
-            client_credential=self.client_secret,
-        )
-
-        token_response = app.acquire_token_for_client(
-            scopes=["https://graph.microsoft.com/.default"]
-        )
+        app = _msal_app(self.tenant_id, self.client_id, self.client_secret)
+        token_response = app.acquire_token_for_client(scopes=GRAPH_SCOPES)
 
         if "access_token" not in token_response:
             raise Exception(
                 f"Auth failed: {token_response.get('error_description', 'Unknown error')}"
             )
 
+        self._token_refresh_at = (
+            time.monotonic() + token_response.get("expires_in", 0) - TOKEN_REFRESH_MARGIN
+        )
         return token_response["access_token"]
 
     def _headers(self) -> dict:
-        return {"Authorization": f"Bearer {self.access_token}"}
+        """
+        Shared Authorization header, rebuilt from the MSAL token cache only when
+        the token nears expiry. Callers copy it ({**self._headers(), ...}) rather
+        than mutate it.
+        """
+        if time.monotonic() >= self._token_refresh_at:
+            self.access_token = self._get_access_token()
+            self._auth_headers = {"Authorization": f"Bearer {self.access_token}"}
+        return self._auth_headers
+
+    def _send(self, method: str, url: str, **kwargs):
+        """Send a request, retrying throttled and transient failures."""
+        for attempt in range(SP_MAX_QUERY_RETRIES + 1):
+            try:
+                response = self.http.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt == SP_MAX_QUERY_RETRIES:
+                    raise
+                time.sleep(_retry_delay(None, attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == SP_MAX_QUERY_RETRIES:
+                return response
+            time.sleep(_retry_delay(response, attempt))
 
     # ── Upload File ────────────────────────────────────────────────────────
 
     def upload_file(
         self,
-        site_id: str,
-        drive_id: str,
         folder_path: str,
         file_name: str,
         content: bytes,
@@ -97,75 +228,210 @@ class SharePointUploader:
         from urllib.parse import quote
         encoded_path = quote(f"{clean_path}/{file_name}")
 
-        url = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}"
-            f"/drives/{drive_id}/root:/{encoded_path}:/content"
-        )
+        item_url = f"{GRAPH_URL}{self.drive_root}/{encoded_path}:"
+
+        if len(content) > SIMPLE_UPLOAD_LIMIT:
+            return self._upload_large_file(item_url, content)
 
         headers = {**self._headers(), "Content-Type": content_type}
-        response = requests.put(url, headers=headers, data=content)
+        response = self._send("PUT", f"{item_url}/content", headers=headers, content=content)
 
         if response.status_code not in (200, 201):
             raise Exception(f"Upload failed [{response.status_code}]: {response.text}")
 
         return response.json()
 
+    def _upload_large_file(self, item_url: str, content: bytes, chunk_size: int = UPLOAD_CHUNK_SIZE) -> dict:
+        """Upload content over SIMPLE_UPLOAD_LIMIT through a Graph upload session, one byte range at a time."""
+        response = self._send(
+            "POST",
+            f"{item_url}/createUploadSession",
+            headers=self._headers(),
+            json={"item": {"@microsoft.graph.conflictBehavior": "replace"}},
+        )
+        if response.status_code != 200:
+            raise Exception(f"Upload session failed [{response.status_code}]: {response.text}")
+        upload_url = response.json()["uploadUrl"]
+
+        total = len(content)
+        for start in range(0, total, chunk_size):
+            chunk = content[start:start + chunk_size]
+            # Pre-authenticated session URL: no Authorization header
+            response = self._send(
+                "PUT",
+                upload_url,
+                headers={"Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{total}"},
+                content=chunk,
+            )
+            if response.status_code not in (200, 201, 202):
+                self.http.delete(upload_url)
+                raise Exception(f"Upload failed [{response.status_code}]: {response.text}")
+
+        return response.json()
+
+    # ── Batch Upload ──────────────────────────────────────────────────────
+
+    def batch_upload_files(
+        self,
+        folder_path: str,
+        files: list,
+        content_type: str = "application/octet-stream",
+    ) -> list:
+        """
+        Upload (file_name, content) pairs through Graph JSON batching, at
+        most GRAPH_BATCH_LIMIT PUTs and GRAPH_BATCH_MAX_BYTES of encoded
+        bodies per request. Returns one error message per file, None where
+        the upload succeeded; a failed batch marks its own files and the
+        remaining batches are still sent.
+        """
+        from urllib.parse import quote
+        clean_path = folder_path.strip("/")
+        errors = [None] * len(files)
+
+        # Files too big to share a batch go up on their own (upload session over 4 MB)
+        batches, positions, batch_bytes = [], [], 0
+        for pos, (file_name, content) in enumerate(files):
+            encoded_size = -(-len(content) // 3) * 4
+            if encoded_size > GRAPH_BATCH_MAX_BYTES:
+                try:
+                    self.upload_file(folder_path, file_name, content, content_type)
+                except Exception as e:
+                    errors[pos] = f"{file_name}: {e}"
+                continue
+            if positions and (len(positions) == GRAPH_BATCH_LIMIT
+                              or batch_bytes + encoded_size > GRAPH_BATCH_MAX_BYTES):
+                batches.append(positions)
+                positions, batch_bytes = [], 0
+            positions.append(pos)
+            batch_bytes += encoded_size
+        if positions:
+            batches.append(positions)
+
+        for positions in batches:
+            chunk = [files[pos] for pos in positions]
+            batch = {
+                "requests": [
+                    {
+                        "id": str(i),
+                        "method": "PUT",
+                        "url": f"{self.drive_root}/{quote(f'{clean_path}/{file_name}')}:/content",
+                        "body": base64.b64encode(content).decode("ascii"),
+                        "headers": {"Content-Type": content_type},
+                    }
+                    for i, (file_name, content) in enumerate(chunk)
+                ]
+            }
+
+            try:
+                response = self._send(
+                    "POST",
+                    f"{GRAPH_URL}/$batch",
+                    headers={**self._headers(), "Content-Type": "application/json"},
+                    json=batch,
+                )
+            except httpx.HTTPError as e:
+                for pos, (file_name, _) in zip(positions, chunk):
+                    errors[pos] = f"{file_name}: batch request failed: {e}"
+                continue
+
+            if response.status_code != 200:
+                for pos, (file_name, _) in zip(positions, chunk):
+                    errors[pos] = f"{file_name} [batch {response.status_code}]: {response.text}"
+                continue
+
+            statuses = {r["id"]: r for r in response.json().get("responses", [])}
+            for i, (pos, (file_name, _)) in enumerate(zip(positions, chunk)):
+                result = statuses.get(str(i), {})
+                if result.get("status") not in (200, 201):
+                    errors[pos] = f"{file_name} [{result.get('status')}]: {result.get('body')}"
+
+        return errors
+
     # ── Upload CSV ────────────────────────────────────────────────────────
 
     def upload_csv(
         self,
-        site_id: str,
-        drive_id: str,
         folder_path: str,
         file_name: str,
         df: pd.DataFrame,
+        compress: bool = False,
     ) -> dict:
 
-        buf = io.BytesIO()
-        df.to_csv(buf, index=False)
-        content = buf.getvalue()
+        content = dataframe_to_csv_bytes(df)
+        content_type = "text/csv"
+
+        # Graph stores the body verbatim, so compressed uploads become .csv.gz files
+        if compress:
+            content = gzip.compress(content, compresslevel=1)
+            content_type = "application/gzip"
+            file_name = f"{file_name}.gz"
 
         return self.upload_file(
-            site_id,
-            drive_id,
             folder_path,
             file_name,
             content,
-            "text/csv",
+            content_type,
         )
 
     # ── List Files ────────────────────────────────────────────────────────
 
-    def list_files(self, site_id: str, drive_id: str, folder_path: str) -> list:
-        clean_path = folder_path.strip("/")
-
-        url = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}"
-            f"/drives/{drive_id}/root:/{clean_path}:/children"
-        )
-
-        response = requests.get(url, headers=self._headers())
+    def _list_page(self, url: str, params) -> dict:
+        response = self._send("GET", url, headers=self._headers(), params=params)
 
         if response.status_code != 200:
             raise Exception(f"List failed [{response.status_code}]: {response.text}")
 
-        return [i for i in response.json().get("value", []) if "file" in i]
+        return response.json()
+
+    def iter_files(self, folder_path: str, select: str = LIST_SELECT):
+        """
+        Yield the folder's files page by page. Each nextLink is requested as
+        soon as it is known, so the next page is in flight while the caller
+        works through the current one.
+        """
+        clean_path = folder_path.strip("/")
+
+        url = f"{GRAPH_URL}{self.drive_root}/{clean_path}:/children"
+
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            pending = prefetch.submit(
+                self._list_page, url, {"$select": select, "$top": LIST_PAGE_SIZE}
+            )
+            while pending:
+                page = pending.result()
+                next_url = page.get("@odata.nextLink")
+                # nextLink already carries the query string
+                pending = prefetch.submit(self._list_page, next_url, None) if next_url else None
+                yield from (i for i in page.get("value", []) if "file" in i)
+
+    def list_files(self, folder_path: str, select: str = LIST_SELECT) -> list:
+        return list(self.iter_files(folder_path, select))
 
     # ── Download File ─────────────────────────────────────────────────────
 
     def download_file(self, download_url: str) -> bytes:
-        response = requests.get(download_url)
+        # Pre-authenticated URL: no Authorization header
+        response = self._send("GET", download_url)
         response.raise_for_status()
         return response.content
 
 
 # ── Helper Functions ────────────────────────────────────────────────────────
 
+@st.cache_resource(show_spinner=False)
+def _cached_uploader(tenant_id: str, client_id: str, client_secret: str,
+                     site_id: str, drive_id: str) -> SharePointUploader:
+    # No TTL needed: _headers() renews the token from the MSAL cache before it expires
+    return SharePointUploader(tenant_id, client_id, client_secret, site_id, drive_id)
+
+
 def _make_uploader(config: dict) -> SharePointUploader:
-    return SharePointUploader(
+    return _cached_uploader(
         tenant_id=config["tenant_id"],
         client_id=config["client_id"],
         client_secret=config["client_secret"],
+        site_id=config["site_id"],
+        drive_id=config["drive_id"],
     )
 
 
@@ -177,58 +443,81 @@ def connect_to_sharepoint(config: dict):
         return None
 
 
+def _output_folder_hashes(uploader: SharePointUploader, config: dict) -> dict:
+    """
+    {file name: quickXorHash} for the output folder, listed fresh for every
+    upload (names and hashes only) so files deleted or replaced on
+    SharePoint are never mistaken for unchanged.
+    """
+    try:
+        items = uploader.list_files(config["output_folder_path"], select=HASH_LIST_SELECT)
+    except Exception:
+        items = []  # e.g. the folder does not exist until the first upload
+    return {i.get("name"): i["file"].get("hashes", {}).get("quickXorHash") for i in items}
+
+
 # ── DOWNLOAD (INPUT FOLDER) ────────────────────────────────────────────────
 
 def download_from_sharepoint(config: dict) -> list:
     try:
         uploader = _make_uploader(config)
 
-        items = uploader.list_files(
-            site_id=config["site_id"],
-            drive_id=config["drive_id"],
-            folder_path=config["input_folder_path"],  # INPUT
-        )
-
-        downloaded = []
-
-        for item in items:
-            dl_url = item.get("@microsoft.graph.downloadUrl")
-            if dl_url:
-                content = uploader.download_file(dl_url)
-                downloaded.append(
-                    {
-                        "name": item.get("name"),
-                        "content": content,
-                        "timestamp": item.get("createdDateTime"),
-                    }
-                )
-
-        return downloaded
+        items = uploader.iter_files(folder_path=config["input_folder_path"])  # INPUT
+
+        # Bounded fan-out over the uploader's shared connection pool; downloads
+        # start with the first listing page rather than after the last
+        with ThreadPoolExecutor(max_workers=SP_MAX_CONNECTIONS) as pool:
+            downloads = [
+                (item, pool.submit(uploader.download_file, item["@microsoft.graph.downloadUrl"]))
+                for item in items
+                if item.get("@microsoft.graph.downloadUrl")
+                and item.get("name", "").lower().endswith(RESUME_EXTENSIONS)
+            ]
+
+            return [
+                {
+                    "name": item.get("name"),
+                    "content": download.result(),
+                    "timestamp": item.get("createdDateTime"),
+                }
+                for item, download in downloads
+            ]
 
     except Exception as e:
         st.error(f"Download error: {str(e)}")
         return []
 
 
-# ── UPLOAD FILE (OUTPUT FOLDER) ────────────────────────────────────────────
+# ── BATCH UPLOAD FILES (OUTPUT FOLDER) ────────────────────────────────────
 
-def upload_to_sharepoint(config: dict, file_content: bytes, file_name: str) -> bool:
+def batch_upload_to_sharepoint(config: dict, files: list) -> int:
+    """
+    Upload (file_name, content) pairs in Graph $batch requests; returns the
+    success count. Files already in the folder with identical content count
+    as uploaded and are not sent again.
+    """
     try:
         uploader = _make_uploader(config)
 
-        uploader.upload_file(
-            site_id=config["site_id"],
-            drive_id=config["drive_id"],
+        known = _output_folder_hashes(uploader, config)
+        pending = [
+            (file_name, content) for file_name, content in files
+            if known.get(file_name) != quick_xor_hash(content)
+        ]
+
+        errors = uploader.batch_upload_files(
             folder_path=config["output_folder_path"],  # OUTPUT
-            file_name=file_name,
-            content=file_content,
+            files=pending,
         )
 
-        return True
+        for error in filter(None, errors):
+            st.error(f"Upload error: {error}")
+
+        return len(files) - len(pending) + errors.count(None)
 
     except Exception as e:
         st.error(f"Upload error: {str(e)}")
-        return False
+        return 0
 
 
 # ── SAVE CSV (OUTPUT FOLDER) ───────────────────────────────────────────────
@@ -238,11 +527,10 @@ def save_csv_to_sharepoint(config: dict, df: pd.DataFrame, filename: str) -> boo
         uploader = _make_uploader(config)
 
         uploader.upload_csv(
-            site_id=config["site_id"],
-            drive_id=config["drive_id"],
             folder_path=config["output_folder_path"],  # OUTPUT
             file_name=filename,
             df=df,
+            compress=config.get("compress_csv", False),
         )
 
         return True